@@ -1,17 +1,12 @@
-import os
 import tkinter as tk
-from slots import SlotsPage
-from parking import ParkingPage
-from payment_view import PaymentViewPage
-from slot_layout import SlotLayoutPage
-from graphs import RevenueSalesGraph
-
-class AdminPanel(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Vehicle Parking Management System")
-        self.state("zoomed")
-        self.configure(bg="#f4f4f4")
+from router import Router
+from startup import lazy_import
+
+class AdminPanel(tk.Frame):
+    def __init__(self, parent, router):
+        super().__init__(parent, bg="#f4f4f4")
+        self.pack(fill=tk.BOTH, expand=True)
+        self.router = router
 
         self.sidebar = tk.Frame(self, bg="#010f26", width=180)
         self.sidebar.pack(side=tk.LEFT, fill=tk.Y)
@@ -23,7 +18,8 @@ class AdminPanel(tk.Tk):
             "Home": self.show_home,
             "Slots": self.show_slots,
             "Parking": self.show_slot_layout,
-            "Payment": self.show_payment_view
+            "Payment": self.show_payment_view,
+            "Export": self.show_export
         }
         for text, command in menu_items.items():
             btn = tk.Button(
@@ -47,41 +43,55 @@ class AdminPanel(tk.Tk):
         self.content_frame = tk.Frame(self, bg="white")
         self.content_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
 
+        # Pages (and their modules) are loaded on first visit and kept afterwards
+        self.pages = Router(self.content_frame)
+        self.pages.register("home", self.build_home)
+        self.pages.register("slots", lambda frame: lazy_import("slots").SlotsPage(frame))
+        self.pages.register("slot_layout",
+                            lambda frame: lazy_import("slot_layout").SlotLayoutPage(frame, router=self.pages))
+        self.pages.register("parking",
+                            lambda frame, **params: lazy_import("parking").ParkingPage(frame, router=self.pages, **params))
+        self.pages.register("payment",
+                            lambda frame, **params: lazy_import("payment").PaymentPage(frame, router=self.pages, **params))
+        self.pages.register("payment_view", lambda frame, **params: lazy_import("payment_view").PaymentViewPage(frame))
+
         self.show_home()
 
-    def show_home(self):
-        self.clear_content()
+    def build_home(self, frame):
         tk.Label(
-            self.content_frame, text="📊 Revenue & Sales Graphs",
+            frame, text="📊 Revenue & Sales Graphs",
             font=("Arial", 20, "bold"), bg="#010f26", fg="white",
             padx=20, pady=15, relief="raised", bd=3
         ).pack(fill="x", padx=0, pady=20)
-        RevenueSalesGraph(self.content_frame)
+        return lazy_import("graphs").RevenueSalesGraph(frame)
+
+    def show_home(self):
+        self.pages.show("home")
 
     def show_slots(self):
-        self.clear_content()
-        SlotsPage(self.content_frame)
+        self.pages.show("slots")
 
     def show_slot_layout(self):
-        self.clear_content()
-        SlotLayoutPage(self.content_frame)
+        self.pages.show("slot_layout")
 
     def show_parking(self):
-        self.clear_content()
-        ParkingPage(self.content_frame)
+        self.pages.show("parking")
 
     def show_payment_view(self):
-        self.clear_content()
-        PaymentViewPage(self.content_frame)
+        self.pages.show("payment_view")
+
+    def show_export(self):
+        lazy_import("export").ExportDialog(self)
 
-    def clear_content(self):
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+    def close(self):
+        self.pages.close_all()
 
     def logout(self):
-        self.destroy()
-        os.system("python index.py")  # Redirects to the main index page
+        # Back to the landing page; dropping the admin panel forgets its pages
+        self.router.show("index")
+        self.after_idle(lambda: self.router.close("admin"))
 
 if __name__ == "__main__":
-    app = AdminPanel()
+    from index import create_app
+    app = create_app(start="admin")
     app.mainloop()
@@ -0,0 +1,247 @@
+"""Cold-history archive.
+
+``python archive.py [--retention-months N]`` moves parkings that have
+exited and been paid for, and are older than the retention window, out of
+tbl_parking/tbl_payment into ARCHIVE_DIR (archive/ next to this module,
+or $PARKING_ARCHIVE_DIR), whatever directory the app runs from. Each month is a directory of
+append-only segments; a segment stores every column as a fixed-width
+NumPy array (strings as int32 codes into the segment's strings.json) and
+is never modified once written, so readers memory-map it and slice rows
+without copying.
+
+tbl_daily_rollup keeps counting archived parkings, so the dashboard is
+unaffected; rollup.rebuild() and the exports read the archive alongside
+the live tables.
+"""
+import argparse
+import datetime
+import json
+import os
+from decimal import Decimal
+
+import numpy as np
+
+from db_connection import db_connection
+
+ARCHIVE_DIR = (os.environ.get("PARKING_ARCHIVE_DIR")
+               or os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive"))
+RETENTION_MONTHS = 12
+DELETE_BATCH = 1000
+
+EPOCH_DATE = datetime.date(1970, 1, 1)
+EPOCH = datetime.datetime(1970, 1, 1)
+NULL = -1
+
+# (column, kind) in the order of export.EXPORT_COLUMNS, then the extra
+# columns the rollup needs.
+ARCHIVE_COLUMNS = [
+    ("ticket_number", "str"), ("custname", "str"), ("veh_no", "str"), ("contact_no", "str"),
+    ("aadhar_no", "str"), ("date", "date"), ("entry_time", "datetime"), ("exit_time", "datetime"),
+    ("slotname", "str"), ("hours_parked", "int"), ("amount", "money"), ("payment_status", "str"),
+    ("park_id", "int"), ("slot_id", "int"), ("slot_number", "int"),
+]
+EXPORTED_COLUMNS = 13
+
+ARCHIVE_QUERY = """
+    SELECT p.ticket_number, pr.custname, pr.veh_no, pr.contact_no, pr.aadhar_no, pr.date, pr.entry_time,
+           pr.exit_time, s.slotname, pr.hours_parked, p.amount, p.status, pr.park_id, pr.slot_id, pr.slot_number
+    FROM tbl_parking pr
+    JOIN tbl_payment p ON p.park_id = pr.park_id
+    LEFT JOIN tbl_slots s ON s.slot_id = pr.slot_id
+    WHERE pr.status = 'Exited' AND p.status = 'Paid' AND pr.date >= %s AND pr.date < %s
+    ORDER BY pr.date, pr.park_id
+"""
+
+DTYPES = {"str": np.int32, "date": np.int32, "datetime": np.int64, "int": np.int64, "money": np.int64}
+
+
+def encode(kind, values, strings):
+    if kind == "str":
+        return [strings.setdefault("" if value is None else str(value), len(strings)) for value in values]
+    if kind == "date":
+        return [(value - EPOCH_DATE).days for value in values]
+    if kind == "datetime":
+        return [NULL if value is None else int((value - EPOCH).total_seconds()) for value in values]
+    if kind == "money":
+        return [int(round(Decimal(value) * 100)) for value in values]
+    return [NULL if value is None else int(value) for value in values]
+
+
+def decode(kind, codes, strings):
+    if kind == "str":
+        return [strings[code] for code in codes]
+    if kind == "date":
+        return [EPOCH_DATE + datetime.timedelta(days=code) for code in codes]
+    if kind == "datetime":
+        return [None if code == NULL else EPOCH + datetime.timedelta(seconds=code) for code in codes]
+    if kind == "money":
+        return [Decimal(code) / 100 for code in codes]
+    return [None if code == NULL else code for code in codes]
+
+
+class Segment:
+    """One immutable, memory-mapped batch of archived rows, sorted by date."""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                        for name, _ in ARCHIVE_COLUMNS}
+        self._strings = None
+
+    def __len__(self):
+        return len(self.columns["park_id"])
+
+    @property
+    def strings(self):
+        if self._strings is None:
+            with open(os.path.join(self.path, "strings.json"), encoding="utf-8") as f:
+                self._strings = json.load(f)
+        return self._strings
+
+    def date_range(self, date_from=None, date_to=None):
+        """Returns the (start, stop) row slice for an inclusive date range."""
+        dates = self.columns["date"]
+        start = np.searchsorted(dates, (date_from - EPOCH_DATE).days, "left") if date_from else 0
+        stop = np.searchsorted(dates, (date_to - EPOCH_DATE).days, "right") if date_to else len(dates)
+        return int(start), int(stop)
+
+    def rows(self, start, stop, columns=ARCHIVE_COLUMNS):
+        decoded = [decode(kind, self.columns[name][start:stop].tolist(), self.strings) for name, kind in columns]
+        return list(zip(*decoded))
+
+
+def month_dirs():
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    return sorted(name for name in os.listdir(ARCHIVE_DIR) if len(name) == 7 and name[4] == "-")
+
+
+def segments(month):
+    month_dir = os.path.join(ARCHIVE_DIR, month)
+    return [Segment(os.path.join(month_dir, name))
+            for name in sorted(os.listdir(month_dir)) if name.startswith("seg-")]
+
+
+def iter_segments(date_from=None, date_to=None):
+    """Yields the segments of every archived month overlapping the date range."""
+    first = date_from.strftime("%Y-%m") if date_from else None
+    last = date_to.strftime("%Y-%m") if date_to else None
+    for month in month_dirs():
+        if (first and month < first) or (last and month > last):
+            continue
+        yield from segments(month)
+
+
+def write_segment(month, rows):
+    """Writes rows as the next segment of a month; the rename makes it appear atomically."""
+    month_dir = os.path.join(ARCHIVE_DIR, month)
+    os.makedirs(month_dir, exist_ok=True)
+    existing = [name for name in os.listdir(month_dir) if name.startswith("seg-")]
+    final = os.path.join(month_dir, f"seg-{len(existing) + 1:04d}")
+    tmp = os.path.join(month_dir, f".{os.path.basename(final)}.tmp")
+    os.makedirs(tmp, exist_ok=True)
+
+    strings = {}
+    for index, (name, kind) in enumerate(ARCHIVE_COLUMNS):
+        values = encode(kind, [row[index] for row in rows], strings)
+        np.save(os.path.join(tmp, f"{name}.npy"), np.array(values, dtype=DTYPES[kind]))
+    with open(os.path.join(tmp, "strings.json"), "w", encoding="utf-8") as f:
+        json.dump(list(strings), f)
+    os.rename(tmp, final)
+
+
+def archived_park_ids(month):
+    month_dir = os.path.join(ARCHIVE_DIR, month)
+    if not os.path.isdir(month_dir):
+        return np.empty(0, dtype=np.int64)
+    parts = [segment.columns["park_id"] for segment in segments(month)]
+    return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def archive(retention_months=RETENTION_MONTHS, today=None):
+    """Archives whole months older than the retention window; returns {month: rows archived}."""
+    cutoff = add_months((today or datetime.date.today()).replace(day=1), -retention_months)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(date) FROM tbl_parking WHERE status = 'Exited' AND date < %s", (cutoff,))
+        oldest = cursor.fetchone()[0]
+
+    archived = {}
+    month_start = oldest.replace(day=1) if oldest else cutoff
+    while month_start < cutoff:
+        month_end = add_months(month_start, 1)
+        month = month_start.strftime("%Y-%m")
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(ARCHIVE_QUERY, (month_start, month_end))
+            rows = cursor.fetchall()
+            if rows:
+                # Rows archived by a run that stopped before deleting them are
+                # only deleted this time.
+                done = set(archived_park_ids(month).tolist())
+                new_rows = [row for row in rows if row[12] not in done]
+                if new_rows:
+                    write_segment(month, new_rows)
+                park_ids = [row[12] for row in rows]
+                for start in range(0, len(park_ids), DELETE_BATCH):
+                    batch = park_ids[start:start + DELETE_BATCH]
+                    placeholders = ", ".join(["%s"] * len(batch))
+                    cursor.execute(f"DELETE FROM tbl_payment WHERE park_id IN ({placeholders})", batch)
+                    cursor.execute(f"DELETE FROM tbl_parking WHERE park_id IN ({placeholders})", batch)
+                conn.commit()
+                archived[month] = len(new_rows)
+        month_start = month_end
+    return archived
+
+
+def stream_archived(date_from=None, date_to=None, status=None, chunk_size=5000):
+    """Yields archived payments in export column order, in chunks of chunk_size rows."""
+    if status and status not in ("All", "Paid"):
+        return
+    date_from = datetime.date.fromisoformat(date_from) if isinstance(date_from, str) else date_from
+    date_to = datetime.date.fromisoformat(date_to) if isinstance(date_to, str) else date_to
+    for segment in iter_segments(date_from, date_to):
+        start, stop = segment.date_range(date_from, date_to)
+        for chunk_start in range(start, stop, chunk_size):
+            yield segment.rows(chunk_start, min(chunk_start + chunk_size, stop), ARCHIVE_COLUMNS[:EXPORTED_COLUMNS])
+
+
+def daily_rollup_rows():
+    """Aggregates the archive into (date, slot_id, revenue, parkings, paid) rows."""
+    totals = {}
+    for segment in iter_segments():
+        if not len(segment):
+            continue
+        keys = np.stack([segment.columns["date"].astype(np.int64), segment.columns["slot_id"]], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        revenue = np.bincount(inverse, weights=segment.columns["amount"], minlength=len(unique))
+        parkings = np.bincount(inverse, minlength=len(unique))
+        for (days, slot_id), cents, count in zip(unique.tolist(), revenue.tolist(), parkings.tolist()):
+            key = (EPOCH_DATE + datetime.timedelta(days=days), slot_id if slot_id != NULL else 0)
+            previous = totals.get(key, (Decimal(0), 0))
+            totals[key] = (previous[0] + Decimal(int(cents)) / 100, previous[1] + count)
+    # Only paid parkings are archived
+    return [(date, slot_id, revenue, count, count) for (date, slot_id), (revenue, count) in sorted(totals.items())]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old exited and paid parkings.")
+    parser.add_argument("--retention-months", type=int, default=RETENTION_MONTHS)
+    parser.add_argument("--list", action="store_true", help="list archived months instead")
+    args = parser.parse_args()
+
+    if args.list:
+        for month in month_dirs():
+            print(f"{month}: {sum(len(segment) for segment in segments(month))} row(s)")
+    else:
+        archived = archive(args.retention_months)
+        for month, count in archived.items():
+            print(f"{month}: archived {count} row(s)")
+        if not archived:
+            print("Nothing to archive.")
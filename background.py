@@ -0,0 +1,81 @@
+import queue
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 30
+
+
+class QueryTask:
+    def __init__(self, group):
+        self.group = group
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class QueryExecutor:
+    """Runs blocking queries on worker threads and hands results back to Tk.
+
+    Workers never touch widgets: results are queued and delivered on the Tk
+    thread by an ``after`` poll that only runs while tasks are in flight.
+    Tasks submitted under a group can be cancelled together (e.g. when the
+    page that asked for them is navigated away from); a cancelled task's
+    callback is never called.
+    """
+
+    def __init__(self, root, workers=4):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query")
+        self._results = queue.Queue()
+        self._pending = set()
+        self._polling = False
+
+    def submit(self, fn, on_success, on_error=None, group=None, args=()):
+        task = QueryTask(group)
+        self._pending.add(task)
+
+        def run():
+            try:
+                self._results.put((task, on_success, fn(*args), None))
+            except Exception as err:
+                self._results.put((task, on_error, None, err))
+
+        self._pool.submit(run)
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        return task
+
+    def cancel(self, group):
+        for task in self._pending:
+            if task.group == group:
+                task.cancel()
+
+    def _poll(self):
+        while True:
+            try:
+                task, callback, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.discard(task)
+            if task.cancelled:
+                continue
+            if error is not None and callback is None:
+                traceback.print_exception(type(error), error, error.__traceback__)
+            elif callback is not None:
+                callback(error if error is not None else result)
+
+        if self._pending:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        else:
+            self._polling = False
+
+
+def get_executor(widget):
+    """Returns the executor bound to the widget's Tk root, creating it on first use."""
+    root = widget._root()
+    executor = getattr(root, "_query_executor", None)
+    if executor is None:
+        executor = root._query_executor = QueryExecutor(root)
+    return executor
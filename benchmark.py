@@ -0,0 +1,251 @@
+"""Headless benchmarks for the hot queries.
+
+``python benchmark.py seed`` creates (or refills) a separate benchmark
+database with synthetic but realistically sized data, and
+``python benchmark.py run`` times the real code paths against it, writes
+the timings to benchmark_results.json and compares them with
+benchmark_baseline.json (both next to this module). ``run --save-baseline`` records a new baseline;
+a run exits non-zero when any case got slower than the baseline by more
+than the tolerance.
+
+Both commands take ``--database NAME`` (default vehicle_bench) and never
+touch the application database.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import mysql.connector
+
+from db_connection import DB_CONFIG, configure_pool, db_connection
+from ticket_allocator import format_ticket
+
+BENCH_DATABASE = "vehicle_bench"
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = os.path.join(BENCH_DIR, "benchmark_results.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "benchmark_baseline.json")
+TOLERANCE = 0.25
+BATCH_SIZE = 5000
+
+FIRST_NAMES = ["Arun", "Meera", "Rahul", "Anjali", "Vivek", "Divya", "Suresh", "Lakshmi", "Nikhil", "Fathima"]
+LAST_NAMES = ["Nair", "Menon", "Pillai", "Kumar", "Das", "Joseph", "Varghese", "Iyer", "Khan", "Thomas"]
+STATES = ["KL", "TN", "KA", "MH", "DL", "AP"]
+
+
+def use_database(name, create=False):
+    if create:
+        config = {key: value for key, value in DB_CONFIG.items() if key != "database"}
+        conn = mysql.connector.connect(**config)
+        conn.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{name}`")
+        conn.close()
+    configure_pool(database=name)
+
+
+def plate(rng):
+    """Returns a random plate in the CC-NN-CC-NNNN format check-ins validate against."""
+    return (f"{rng.choice(STATES)}-{rng.randint(1, 99):02d}-"
+            f"{chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}-{rng.randint(1, 9999):04d}")
+
+
+def insert_batches(cursor, conn, statement, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(statement, rows[start:start + BATCH_SIZE])
+        conn.commit()
+
+
+def seed(parkings=1_000_000, categories=300, days=365, occupancy=0.4, seed_value=1):
+    """Fills the benchmark database; the same arguments always produce the same data."""
+    import migrations
+    import rollup
+
+    migrations.migrate()
+    rng = random.Random(seed_value)
+    today = datetime.date.today()
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        for table in ("tbl_payment", "tbl_parking", "tbl_slots", "tbl_sequence"):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+
+        slots = [(slot_id, f"Category {slot_id}", rng.choice((10, 20, 30, 50)), rng.randint(20, 200), "Active")
+                 for slot_id in range(1, categories + 1)]
+        insert_batches(cursor, conn, "INSERT INTO tbl_slots (slot_id, slotname, fare, number_of_slots, status) "
+                                     "VALUES (%s, %s, %s, %s, %s)", slots)
+
+        # Active parkings fill a share of every category's slots (each slot at
+        # most once); everything else is history spread over the past days.
+        active = [(slot_id, number) for slot_id, _, _, capacity, _ in slots
+                  for number in rng.sample(range(1, capacity + 1), int(capacity * occupancy))]
+        active = active[:parkings]
+        active_from = parkings - len(active)
+
+        parking_rows, payment_rows = [], []
+        per_year = {}
+        for park_id in range(1, parkings + 1):
+            if park_id > active_from:
+                slot_id, slot_number = active[park_id - active_from - 1]
+                status, day = "Parked", today
+            else:
+                slot_id = rng.randint(1, categories)
+                slot_number = rng.randint(1, slots[slot_id - 1][3])
+                status = "Exited"
+                day = today - datetime.timedelta(days=days * park_id // parkings)
+            entry = datetime.datetime.combine(day, datetime.time(rng.randint(0, 23), rng.randint(0, 59)))
+            hours = rng.randint(1, 12)
+            parking_rows.append((park_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", plate(rng),
+                                 f"9{rng.randint(100000000, 999999999)}", f"{rng.randint(10 ** 11, 10 ** 12 - 1)}",
+                                 entry, day, status, slot_id, slot_number, entry + datetime.timedelta(hours=hours)))
+
+            year = day.year % 100
+            per_year[year] = per_year.get(year, 0) + 1
+            paid = "Paid" if status == "Exited" or rng.random() < 0.5 else "Pending"
+            payment_rows.append((park_id, hours * 10, format_ticket(year, per_year[year]), paid))
+
+            if len(parking_rows) == BATCH_SIZE or park_id == parkings:
+                cursor.executemany("""
+                    INSERT INTO tbl_parking (park_id, custname, veh_no, contact_no, aadhar_no,
+                                             entry_time, date, status, slot_id, slot_number, exit_time)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, parking_rows)
+                cursor.executemany("INSERT INTO tbl_payment (park_id, amount, ticket_number, status) "
+                                   "VALUES (%s, %s, %s, %s)", payment_rows)
+                conn.commit()
+                parking_rows, payment_rows = [], []
+
+    rollup.rebuild()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(samples[0], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "runs": repeat,
+    }
+
+
+def benchmark_cases():
+    """Returns (name, fn) pairs timing the code behind each page's hot path."""
+    from occupancy import OccupancyIndex
+    from checkin import check_in
+    from payment_view import fetch_payment_page
+    from rollup import fetch_daily_totals
+    from ticket_allocator import TicketAllocator
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        # A key one page from the oldest end, so the deep page is the last one
+        cursor.execute("SELECT pr.date, pr.park_id FROM tbl_parking pr ORDER BY pr.date, pr.park_id "
+                       "LIMIT 1 OFFSET 100")
+        deep_key = cursor.fetchone()
+        cursor.execute("SELECT slot_id, number_of_slots FROM tbl_slots ORDER BY slot_id LIMIT 1")
+        slot_id, capacity = cursor.fetchone()
+
+    allocator = TicketAllocator()
+    reserving_allocator = TicketAllocator(block_size=1)
+    slot_numbers = iter(range(capacity + 1, 10 ** 9))
+    plate_numbers = iter(range(1, 10 ** 9))
+
+    def add_parking():
+        check_in("Bench Customer", f"KL-01-BE-{next(plate_numbers) % 10000:04d}", "9000000000", "100000000000",
+                 slot_id, str(next(slot_numbers)), 2, allocator.next_ticket())
+
+    return [
+        ("payment_view.first_page", lambda: fetch_payment_page()),
+        ("payment_view.deep_page", lambda: fetch_payment_page(after=deep_key)),
+        ("slot_layout.occupancy_load", lambda: OccupancyIndex().load()),
+        ("graphs.fetch_data", fetch_daily_totals),
+        ("parking.generate_ticket_number", allocator.next_ticket),
+        ("parking.generate_ticket_number_reserve", reserving_allocator.next_ticket),
+        ("parking.add_parking", add_parking),
+    ]
+
+
+def compare(results, baseline, tolerance):
+    """Returns the cases whose median regressed past the tolerance."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            regressions.append((name, before["median_ms"], result["median_ms"]))
+    return regressions
+
+
+def run(repeat=20, only=None, save_baseline=False, tolerance=TOLERANCE):
+    results = {}
+    for name, fn in benchmark_cases():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        fn()  # warm the pool and any caches
+        results[name] = timed(fn, repeat)
+        print(f"{name:40} median {results[name]['median_ms']:9.2f} ms   p95 {results[name]['p95_ms']:9.2f} ms")
+
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    if save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_FILE}.")
+        return 0
+
+    try:
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No {BASELINE_FILE}; run with --save-baseline to record one.")
+        return 0
+
+    regressions = compare(results, baseline, tolerance)
+    for name, before, after in regressions:
+        print(f"REGRESSION {name}: {before:.2f} ms -> {after:.2f} ms")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed and run the parking system benchmarks.")
+    parser.add_argument("--database", default=BENCH_DATABASE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="fill the benchmark database with synthetic data")
+    seed_parser.add_argument("--parkings", type=int, default=1_000_000)
+    seed_parser.add_argument("--categories", type=int, default=300)
+    seed_parser.add_argument("--days", type=int, default=365)
+    seed_parser.add_argument("--seed", type=int, default=1)
+
+    run_parser = commands.add_parser("run", help="time the hot paths and compare with the baseline")
+    run_parser.add_argument("--repeat", type=int, default=20)
+    run_parser.add_argument("--only", nargs="*", help="only run cases whose name starts with one of these")
+    run_parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    run_parser.add_argument("--save-baseline", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.database == DB_CONFIG["database"]:
+        parser.error("refusing to benchmark against the application database")
+
+    if args.command == "seed":
+        use_database(args.database, create=True)
+        start = time.perf_counter()
+        seed(args.parkings, args.categories, args.days, seed_value=args.seed)
+        print(f"Seeded {args.database} in {time.perf_counter() - start:.1f} s.")
+        return 0
+
+    use_database(args.database)
+    return run(args.repeat, args.only, args.save_baseline, args.tolerance)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
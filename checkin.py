@@ -0,0 +1,262 @@
+"""Check-in and exit write paths.
+
+Vehicles check in one at a time from the parking form or in bulk from a
+CSV, and leave by park_id.
+
+``python checkin.py vehicles.csv --slot-id N`` imports a fleet or event
+list from the command line; the parking page offers the same import.
+The CSV needs the columns in CSV_COLUMNS; slot_number and slot_id are
+optional per row, and rows without a bay get the lowest free ones.
+"""
+import argparse
+import csv
+import os
+import re
+import sys
+
+from db_connection import call_first_row, db_connection
+from occupancy import get_occupancy_index
+from plates import get_plate_index
+from rollup import bump_data_version, record_parkings
+from tariff import get_tariff_engine
+from ticket_allocator import allocate_ticket_numbers
+
+CSV_COLUMNS = ("custname", "veh_no", "contact_no", "aadhar_no", "duration")
+OPTIONAL_COLUMNS = ("slot_number", "slot_id")
+VEHICLE_PATTERN = r"^[A-Z]{2}-\d{2}-[A-Z]{1,2}-\d{4}$"
+# Rows per multi-row INSERT; keeps each statement well under max_allowed_packet.
+INSERT_BATCH = 1000
+
+ACTIVE_PARK_ID_QUERY = "SELECT park_id FROM tbl_parking WHERE slot_id = %s AND status = 'Parked' AND slot_number = %s"
+PARKED_BAY_QUERY = "SELECT slot_id, slot_number FROM tbl_parking WHERE park_id = %s AND status = 'Parked'"
+CHECK_OUT_QUERY = "UPDATE tbl_parking SET status = 'Exited' WHERE park_id = %s AND status = 'Parked'"
+MAX_PARK_ID_QUERY = "SELECT COALESCE(MAX(park_id), 0) FROM tbl_parking"
+
+
+def inserted_park_ids_query(floor, plates):
+    """Returns (sql, params) reading back the park_ids this transaction gave to plates above floor."""
+    placeholders = ", ".join(["%s"] * len(plates))
+    return (f"SELECT park_id, veh_no FROM tbl_parking WHERE park_id > %s AND veh_no IN ({placeholders})",
+            (floor, *plates))
+
+
+def validate_parking(cust_name, veh_no, contact_no, aadhar_no, duration):
+    """Returns the first problem with a check-in's fields, or None if they are valid."""
+    if not cust_name.replace(" ", "").isalpha():
+        return "Customer Name should contain only alphabets!"
+    if not re.match(VEHICLE_PATTERN, veh_no):
+        return "Vehicle Number format: CC-NN-C-NNNN or CC-NN-CC-NNNN"
+    if not contact_no.isdigit() or len(contact_no) != 10:
+        return "Contact Number should be exactly 10 digits!"
+    if not aadhar_no.isdigit() or len(aadhar_no) != 12:
+        return "Aadhar Number must be exactly 12 digits!"
+    if not duration.isdigit() or not (1 <= int(duration) <= 999):
+        return "Parking Hours should be a 3-digit number (max 999)!"
+    return None
+
+
+def check_in(cust_name, veh_no, contact_no, aadhar_no, slot_id, slot_number, duration, ticket_number):
+    """Checks one vehicle in with a single call to sp_check_in.
+
+    The amount is priced in memory by the tariff engine; the parking,
+    payment and rollup rows commit together or not at all. Returns
+    (park_id, ticket_number, amount, entry_time, exit_time, hours).
+    """
+    amount = get_tariff_engine().price(slot_id, duration)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        # A plain CALL is one round trip; callproc() would add SET and SELECT
+        # statements for the OUT-parameter user variables.
+        result = call_first_row(cursor, "CALL sp_check_in(%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                                (cust_name, veh_no, contact_no, aadhar_no, slot_id, slot_number, duration,
+                                 ticket_number, amount))
+    park_id = result[0]
+    bump_data_version()
+    if slot_id and str(slot_number).isdigit():
+        get_occupancy_index().occupy(slot_id, int(slot_number), park_id)
+    get_plate_index().add(park_id, veh_no)
+    return tuple(result)
+
+
+def active_park_id(slot_id, slot_number):
+    """Returns the park_id of the vehicle parked in a bay, or None if it is free."""
+    park_id = get_occupancy_index().park_id(slot_id, slot_number)
+    if park_id is not None:
+        return park_id
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ACTIVE_PARK_ID_QUERY, (slot_id, slot_number))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def check_out(park_id):
+    """Marks one active parking as exited and frees its bay; False if it was not active."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(PARKED_BAY_QUERY, (park_id,))
+        bay = cursor.fetchone()
+        if bay is None:
+            get_plate_index().remove(park_id)
+            return False
+        cursor.execute(CHECK_OUT_QUERY, (park_id,))
+        conn.commit()
+    get_occupancy_index().release(*bay)
+    get_plate_index().remove(park_id)
+    return True
+
+
+def assign_bays(rows, errors):
+    """Gives every row a free bay, keeping valid requested bays; drops rows that cannot get one."""
+    index = get_occupancy_index()
+    claimed = set()
+    placed, waiting = [], []
+
+    for row in rows:
+        line, slot_id, slot_number = row["line"], row["slot_id"], row["slot_number"]
+        if index.category(slot_id) is None:
+            errors.append((line, f"Unknown slot category {slot_id}"))
+        elif slot_number is None:
+            waiting.append(row)
+        elif index.is_occupied(slot_id, slot_number) or (slot_id, slot_number) in claimed:
+            errors.append((line, f"Slot {slot_number} is already occupied"))
+        elif not 1 <= slot_number <= index.category(slot_id)[1]:
+            errors.append((line, f"Slot {slot_number} does not exist in this category"))
+        else:
+            claimed.add((slot_id, slot_number))
+            placed.append(row)
+
+    free_bays = {}
+    for row in waiting:
+        slot_id = row["slot_id"]
+        if slot_id not in free_bays:
+            wanted = sum(1 for other in waiting if other["slot_id"] == slot_id) + len(claimed)
+            free_bays[slot_id] = iter([number for number in index.free_slots(slot_id, wanted)
+                                       if (slot_id, number) not in claimed])
+        row["slot_number"] = next(free_bays[slot_id], None)
+        if row["slot_number"] is None:
+            errors.append((row["line"], "No free slot left in this category"))
+        else:
+            placed.append(row)
+    return placed
+
+
+def bulk_check_in(records, slot_id=None):
+    """Checks in a list of vehicles in one transaction.
+
+    ``records`` are (line, dict) pairs keyed by the CSV columns; slot_id is
+    used for rows that do not name a category. Rows that fail validation or
+    cannot be given a bay are skipped and reported. Returns
+    (checked_in, errors) where checked_in holds
+    (line, park_id, ticket_number, slot_id, slot_number) and errors holds
+    (line, message).
+    """
+    rows, errors = [], []
+    plates = get_plate_index()
+    seen = set()
+    for line, record in records:
+        fields = {key: (record.get(key) or "").strip() for key in CSV_COLUMNS + OPTIONAL_COLUMNS}
+        error = validate_parking(*(fields[key] for key in CSV_COLUMNS))
+        if error is None and (fields["veh_no"] in seen or plates.is_active(fields["veh_no"])):
+            error = "Vehicle is already parked"
+        row_slot_id = fields["slot_id"] or slot_id
+        if error is None and not str(row_slot_id or "").isdigit():
+            error = "No slot category given"
+        if error is None and fields["slot_number"] and not fields["slot_number"].isdigit():
+            error = "Slot Number must be a number"
+        if error:
+            errors.append((line, error))
+            continue
+        seen.add(fields["veh_no"])
+        fields.update(line=line, slot_id=int(row_slot_id), duration=int(fields["duration"]),
+                      slot_number=int(fields["slot_number"]) if fields["slot_number"] else None)
+        rows.append(fields)
+
+    rows = assign_bays(rows, errors)
+    if not rows:
+        return [], sorted(errors)
+
+    tickets = allocate_ticket_numbers(len(rows))
+    tariffs = get_tariff_engine()
+    checked_in = []
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(rows), INSERT_BATCH):
+            batch = rows[start:start + INSERT_BATCH]
+            batch_tickets = tickets[start:start + INSERT_BATCH]
+            # Auto-increment ids need not be consecutive (interleaved lock
+            # mode, or executemany falling back to one INSERT per row), so
+            # the ids are read back by plate from above the current maximum.
+            # Plates are unique among the batch and the parked vehicles.
+            cursor.execute(MAX_PARK_ID_QUERY)
+            floor = cursor.fetchone()[0]
+            cursor.executemany("""
+                INSERT INTO tbl_parking
+                (custname, veh_no, contact_no, aadhar_no, entry_time, date, status, slot_id, slot_number, exit_time)
+                VALUES (%s, %s, %s, %s, NOW(), NOW(), 'Parked', %s, %s, DATE_ADD(NOW(), INTERVAL %s HOUR))
+            """, [(row["custname"], row["veh_no"], row["contact_no"], row["aadhar_no"],
+                   row["slot_id"], row["slot_number"], row["duration"]) for row in batch])
+            if cursor.rowcount != len(batch):
+                raise RuntimeError(f"Inserted {cursor.rowcount} of {len(batch)} parkings")
+            cursor.execute(*inserted_park_ids_query(floor, [row["veh_no"] for row in batch]))
+            by_plate = {veh_no: park_id for park_id, veh_no in cursor.fetchall()}
+            park_ids = [by_plate[row["veh_no"]] for row in batch]
+
+            cursor.executemany("INSERT INTO tbl_payment (park_id, amount, ticket_number) VALUES (%s, %s, %s)",
+                               [(park_id, tariffs.price(row["slot_id"], row["duration"]), ticket)
+                                for park_id, row, ticket in zip(park_ids, batch, batch_tickets)])
+            record_parkings(cursor, park_ids)
+            checked_in.extend((row["line"], park_id, ticket, row["slot_id"], row["slot_number"])
+                              for park_id, row, ticket in zip(park_ids, batch, batch_tickets))
+        conn.commit()
+    bump_data_version()
+
+    index = get_occupancy_index()
+    for _, park_id, _, row_slot_id, slot_number in checked_in:
+        index.occupy(row_slot_id, slot_number, park_id)
+    for row, (_, park_id, _, _, _) in zip(rows, checked_in):
+        plates.add(park_id, row["veh_no"])
+    return checked_in, sorted(errors)
+
+
+def read_checkin_csv(path):
+    """Reads a check-in CSV into (line, record) pairs; raises ValueError on missing columns."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(missing)}")
+        # Line 1 is the header.
+        return [(line, record) for line, record in enumerate(reader, start=2)]
+
+
+def import_csv_file(path, slot_id=None):
+    """Imports a check-in CSV and writes rejected rows next to it.
+
+    Returns (checked_in, errors, report_path); report_path is None when
+    every row was imported.
+    """
+    checked_in, errors = bulk_check_in(read_checkin_csv(path), slot_id)
+    report_path = None
+    if errors:
+        report_path = os.path.splitext(path)[0] + "_errors.csv"
+        with open(report_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["line", "error"])
+            writer.writerows(errors)
+    return checked_in, errors, report_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk check-in from a CSV file.")
+    parser.add_argument("csv_file")
+    parser.add_argument("--slot-id", type=int, help="category for rows without a slot_id column")
+    args = parser.parse_args()
+
+    checked_in, errors, report_path = import_csv_file(args.csv_file, args.slot_id)
+    print(f"Checked in {len(checked_in)} vehicle(s).")
+    for line, message in errors:
+        print(f"line {line}: {message}")
+    if report_path:
+        print(f"Rejected rows written to {report_path}.")
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,70 @@
+"""In-memory columnar store for rows a page has already loaded.
+
+Rows are kept as one list per column, holding the values as the database
+returned them (str, Decimal, date, ...), plus a lower-cased search key per
+row built from the searchable columns. Sorting by a column computes its
+permutation once and reuses it until rows are added or dropped, so re-sorting
+and flipping direction never touch the database or re-sort the rows.
+"""
+
+
+class ColumnStore:
+    def __init__(self, width, search_columns=()):
+        self.columns = [[] for _ in range(width)]
+        self.search_columns = search_columns
+        self._search = []
+        self._orders = {}
+
+    def __len__(self):
+        return len(self._search)
+
+    def extend(self, rows):
+        if not rows:
+            return
+        for column, values in zip(self.columns, zip(*rows)):
+            column.extend(values)
+        self._search.extend(self._search_key(row) for row in rows)
+        self._orders.clear()
+
+    def extend_front(self, rows):
+        """Inserts rows before the current first row, keeping their order."""
+        if not rows:
+            return
+        for column, values in zip(self.columns, zip(*rows)):
+            column[:0] = values
+        self._search[:0] = [self._search_key(row) for row in rows]
+        self._orders.clear()
+
+    def drop_front(self, count):
+        self._drop(slice(0, count))
+
+    def drop_back(self, count):
+        self._drop(slice(len(self) - count, len(self)))
+
+    def _drop(self, span):
+        for column in self.columns:
+            del column[span]
+        del self._search[span]
+        self._orders.clear()
+
+    def _search_key(self, row):
+        return "\x00".join("" if row[i] is None else str(row[i]).lower() for i in self.search_columns)
+
+    def row(self, index):
+        return tuple(column[index] for column in self.columns)
+
+    def order(self, column, descending=False):
+        """Returns row indices sorted on one column; empty values sort last either way."""
+        ascending = self._orders.get(column)
+        if ascending is None:
+            values = self.columns[column]
+            present = sorted((i for i in range(len(values)) if values[i] is not None), key=values.__getitem__)
+            missing = [i for i in range(len(values)) if values[i] is None]
+            self._orders[column] = ascending = (present, missing)
+        present, missing = ascending
+        return (present[::-1] if descending else present) + missing
+
+    def matching(self, needle, indices):
+        """Filters indices to the rows whose search key contains needle."""
+        search = self._search
+        return [i for i in indices if needle in search[i]]
@@ -1,9 +1,238 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import mysql.connector
 
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",  # Default XAMPP MySQL user
+    "password": "",  # Default password for XAMPP
+    "database": "vehicle",  # Replace with your database name
+}
+
+
+class PooledConnection:
+    """Wraps a MySQL connection so that close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.last_used = time.monotonic()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            pool.release(self)
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections.
+
+    Connections are pinged before they are handed out, recycled once they
+    have sat idle longer than ``idle_timeout`` seconds and re-opened with
+    exponential backoff when the server cannot be reached.
+    """
+
+    def __init__(self, size=5, idle_timeout=300, checkout_timeout=10,
+                 retries=3, backoff=0.5, **config):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.config = config or dict(DB_CONFIG)
+
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {"checkouts": 0, "waits": 0, "handshakes": 0,
+                       "recycled": 0, "failed_pings": 0, "reconnects": 0}
+
+    def _connect(self):
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                raw = mysql.connector.connect(**self.config)
+                with self._cond:
+                    self._stats["handshakes"] += 1
+                    if attempt:
+                        self._stats["reconnects"] += 1
+                return raw
+            except mysql.connector.Error:
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+
+    def _is_alive(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except mysql.connector.Error:
+            pass
+
+    def acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            self._stats["checkouts"] += 1
+            waited = False
+            while not self._idle and self._open >= self.size:
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._open >= self.size:
+                        raise TimeoutError("Timed out waiting for a database connection")
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+
+        try:
+            if conn is not None:
+                if time.monotonic() - conn.last_used > self.idle_timeout:
+                    self._discard(conn._raw)
+                    with self._cond:
+                        self._stats["recycled"] += 1
+                    conn = PooledConnection(self, self._connect())
+                elif not self._is_alive(conn._raw):
+                    self._discard(conn._raw)
+                    with self._cond:
+                        self._stats["failed_pings"] += 1
+                    conn = PooledConnection(self, self._connect())
+                else:
+                    conn._pool = self
+            else:
+                conn = PooledConnection(self, self._connect())
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def release(self, conn):
+        # End any open transaction so the next borrower does not read from
+        # a stale REPEATABLE READ snapshot.
+        try:
+            conn._raw.rollback()
+            healthy = True
+        except mysql.connector.Error:
+            healthy = False
+
+        with self._cond:
+            if healthy:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not healthy:
+            self._discard(conn._raw)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+        stats["handshakes_saved"] = max(0, stats["checkouts"] - stats["handshakes"])
+        return stats
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for conn in idle:
+            self._discard(conn._raw)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(**DB_CONFIG)
+        return _pool
+
+
+def configure_pool(**config):
+    """Points the shared pool at another server or database (e.g. for benchmarks)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = ConnectionPool(**dict(DB_CONFIG, **config))
+    return _pool
+
+
 def connect_to_db():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",  # Default XAMPP MySQL user
-        password="",  # Default password for XAMPP
-        database="vehicle"  # Replace with your database name
-    )
+    """Checks a connection out of the shared pool; close() returns it."""
+    return get_pool().acquire()
+
+
+def db_connection():
+    """Context manager yielding a pooled connection."""
+    return get_pool().connection()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def call_first_row(cursor, sql, params=()):
+    """Runs a CALL in one round trip and returns the first row it selects.
+
+    Connector/Python 9.2+ reads a CALL's result sets through nextset();
+    older drivers have no nextset() and only accept one through
+    execute(multi=True), which 9.2 removed. Every result set is drained
+    either way, so the connection goes back to the pool clean.
+    """
+    if hasattr(cursor, "nextset"):
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        while cursor.nextset():
+            pass
+        return row
+    row = None
+    for result in cursor.execute(sql, params, multi=True):
+        if result.with_rows:
+            rows = result.fetchall()
+            if row is None and rows:
+                row = rows[0]
+    return row
+
+
+def values_table(rows, columns):
+    """Returns (sql, params) for an inline derived table holding rows.
+
+    Lets a batch be joined into one UPDATE or INSERT ... SELECT instead of
+    running a statement per row; alias the result in the caller's SQL.
+    """
+    first = "SELECT " + ", ".join(f"%s AS {column}" for column in columns)
+    rest = "SELECT " + ", ".join(["%s"] * len(columns))
+    sql = "(" + " UNION ALL ".join([first] + [rest] * (len(rows) - 1)) + ")"
+    return sql, tuple(value for row in rows for value in row)
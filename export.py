@@ -0,0 +1,165 @@
+"""Streaming export of the payment view join.
+
+``python export.py payments.csv [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+[--status Paid|Pending] [--format csv|jsonl]`` writes every matching
+payment, archived months (see archive.py) first and then the live
+tables, oldest first. Live rows are read through an unbuffered cursor in
+chunks of CHUNK_SIZE and written straight out, so memory use does not
+grow with the table. The admin panel's Export action runs the same code.
+"""
+import argparse
+import csv
+import json
+import sys
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from archive import stream_archived
+from background import get_executor
+from db_connection import db_connection
+from payment_view import PAYMENT_QUERY
+
+EXPORT_COLUMNS = ["ticket_number", "custname", "veh_no", "contact_no", "aadhar_no", "date", "entry_time",
+                  "exit_time", "slotname", "hours_parked", "amount", "payment_status", "park_id"]
+FORMATS = ("csv", "jsonl")
+PAYMENT_STATUSES = ("All", "Paid", "Pending")
+CHUNK_SIZE = 5000
+
+
+def build_export_filter(date_from=None, date_to=None, status=None):
+    clauses, params = [], []
+    if date_from:
+        clauses.append("pr.date >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("pr.date <= %s")
+        params.append(date_to)
+    if status and status != "All":
+        clauses.append("p.status = %s")
+        params.append(status)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), tuple(params)
+
+
+def export_query(date_from=None, date_to=None, status=None):
+    """Returns (sql, params) for the live payments matching the filters, oldest first."""
+    where, params = build_export_filter(date_from, date_to, status)
+    return f"{PAYMENT_QUERY} {where} ORDER BY pr.date, pr.park_id", params
+
+
+def stream_payments(date_from=None, date_to=None, status=None, chunk_size=CHUNK_SIZE):
+    """Yields lists of up to chunk_size payment rows: archived months first, then the live tables."""
+    yield from stream_archived(date_from, date_to, status, chunk_size)
+
+    with db_connection() as conn:
+        # Unbuffered: the server streams rows as they are fetched
+        cursor = conn.cursor(buffered=False)
+        cursor.execute(*export_query(date_from, date_to, status))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
+
+
+def write_csv(file, chunks):
+    writer = csv.writer(file)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for rows in chunks:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def write_jsonl(file, chunks):
+    count = 0
+    for rows in chunks:
+        file.write("".join(json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n" for row in rows))
+        count += len(rows)
+    return count
+
+
+def export_payments(path, fmt=None, date_from=None, date_to=None, status=None):
+    """Writes the filtered payments to path and returns how many rows were written."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".json")) else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    writer = write_csv if fmt == "csv" else write_jsonl
+    with open(path, "w", newline="", encoding="utf-8", buffering=1 << 20) as file:
+        return writer(file, stream_payments(date_from, date_to, status))
+
+
+class ExportDialog:
+    """Admin panel dialog that picks the filters and exports on a worker thread."""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.window = tk.Toplevel(parent)
+        self.window.title("Export Payments")
+        self.window.configure(bg="#EAF2F8")
+        self.window.resizable(False, False)
+
+        tk.Label(self.window, text="Export Payments", font=("Arial", 16, "bold"),
+                 bg="#010f26", fg="white", pady=10).pack(fill=tk.X)
+
+        form = tk.Frame(self.window, bg="#EAF2F8", padx=20, pady=10)
+        form.pack(fill=tk.BOTH, expand=True)
+
+        self.vars = {
+            "date_from": tk.StringVar(),
+            "date_to": tk.StringVar(),
+            "status": tk.StringVar(value="All"),
+            "format": tk.StringVar(value="csv"),
+        }
+        for row, (label, key) in enumerate((("From (YYYY-MM-DD)", "date_from"), ("To (YYYY-MM-DD)", "date_to"))):
+            tk.Label(form, text=label, font=("Arial", 12, "bold"), bg="#EAF2F8", fg="#010f26").grid(
+                row=row, column=0, padx=10, pady=8, sticky="w")
+            tk.Entry(form, textvariable=self.vars[key], font=("Arial", 12), bd=2, relief="solid").grid(
+                row=row, column=1, padx=10, pady=8, sticky="ew")
+
+        for row, (label, key, values) in enumerate((("Payment Status", "status", PAYMENT_STATUSES),
+                                                    ("Format", "format", FORMATS)), start=2):
+            tk.Label(form, text=label, font=("Arial", 12, "bold"), bg="#EAF2F8", fg="#010f26").grid(
+                row=row, column=0, padx=10, pady=8, sticky="w")
+            ttk.Combobox(form, textvariable=self.vars[key], values=values, state="readonly",
+                         font=("Arial", 12)).grid(row=row, column=1, padx=10, pady=8, sticky="ew")
+
+        self.export_button = tk.Button(form, text="📤 Export", font=("Arial", 13, "bold"), bg="#27AE60", fg="white",
+                                       padx=10, pady=5, bd=0, command=self.export)
+        self.export_button.grid(row=4, columnspan=2, pady=10)
+
+    def export(self):
+        fmt = self.vars["format"].get()
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=f".{fmt}",
+                                            filetypes=[(fmt.upper(), f"*.{fmt}"), ("All files", "*.*")])
+        if not path:
+            return
+        self.export_button.config(state="disabled", text="⏳ Exporting...")
+        get_executor(self.parent).submit(
+            export_payments, self.on_done, self.on_failed, group=self,
+            args=(path, fmt, self.vars["date_from"].get().strip() or None,
+                  self.vars["date_to"].get().strip() or None, self.vars["status"].get()))
+
+    def on_done(self, count):
+        messagebox.showinfo("Export Finished", f"Exported {count} payment(s).", parent=self.parent)
+        if self.window.winfo_exists():
+            self.window.destroy()
+
+    def on_failed(self, err):
+        if self.window.winfo_exists():
+            self.export_button.config(state="normal", text="📤 Export")
+        messagebox.showerror("Export Failed", str(err), parent=self.parent)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export payments to CSV or JSON Lines.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--from", dest="date_from")
+    parser.add_argument("--to", dest="date_to")
+    parser.add_argument("--status", choices=PAYMENT_STATUSES)
+    args = parser.parse_args()
+
+    count = export_payments(args.path, args.format, args.date_from, args.date_to, args.status)
+    print(f"Exported {count} payment(s) to {args.path}.", file=sys.stderr)
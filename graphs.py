@@ -1,14 +1,61 @@
+import time
 import tkinter as tk
 from tkinter import ttk, Canvas, Frame
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from db_connection import connect_to_db
+from background import get_executor
+from rollup import data_version, fetch_daily_series, fetch_daily_totals, fetch_rollup_token
+
+PIE_COLORS = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
+ALL_GRAPHS = ("revenue", "sales", "pie", "scatter", "growth")
+CHART_SERIES = {
+    "revenue": ("revenue",),
+    "sales": ("sales",),
+    "pie": ("revenue",),
+    "scatter": ("revenue", "sales"),
+    "growth": ("revenue",),
+}
+
+# Seconds a cached series is trusted before its rollup token is checked
+# again, which is when writes made by other processes show up
+SERIES_RECHECK_SECONDS = 30
+
+# Series shared by every RevenueSalesGraph in the process, keyed on the
+# rollup data version and table token they were read at
+_series_cache = {}
+
+
+def cached_series(name):
+    """Returns the cached series if it is still current, otherwise None."""
+    series = _series_cache.get(name)
+    if not series or series["version"] != data_version():
+        return None
+    return series if time.monotonic() - series["checked_at"] < SERIES_RECHECK_SECONDS else None
+
+
+def load_series(name):
+    """Fetches one series and caches it, re-reading only if the rollup changed. Safe on a worker thread."""
+    version = data_version()
+    token = fetch_rollup_token()
+    series = _series_cache.get(name)
+    if series is None or series["token"] != token:
+        rows = fetch_daily_series(name)
+        cast = float if name == "revenue" else int
+        series = {"token": token, "dates": [str(row[0]) for row in rows], "values": [cast(row[1]) for row in rows]}
+    series = dict(series, version=version, checked_at=time.monotonic())
+    _series_cache[name] = series
+    return series
+
 
 class RevenueSalesGraph:
     def __init__(self, root):
         self.root = root
         self.root.configure(bg="white")
 
+        self.executor = get_executor(self.root)
+        self.graph_type = None
+        self.inflight = set()
+
         self.create_ui()
         self.show_graph("all")
 
@@ -59,137 +106,163 @@ class RevenueSalesGraph:
 
         self.canvas = canvas
         self.current_canvas = None
-
-
-
+        self.figure_canvases = {}  # layout ("single"/"all") -> FigureCanvasTkAgg
+        self.drawn = {}            # axes -> (graph type, data version) currently drawn
 
     def fetch_data(self):
-        """Fetches revenue and sales data from the database."""
-        conn = connect_to_db()
-        cursor = conn.cursor()
-
-        # Fetch Revenue Data (Total Payments Per Date)
-        cursor.execute("""
-            SELECT p.date, SUM(pay.amount) 
-            FROM tbl_payment pay
-            JOIN tbl_parking p ON pay.park_id = p.park_id
-            GROUP BY p.date 
-            ORDER BY p.date
-        """)
-        revenue_data = cursor.fetchall()
-
-        # Fetch Sales Data (Total Parked Vehicles Per Date)
-        cursor.execute("SELECT date, COUNT(*) FROM tbl_parking GROUP BY date ORDER BY date")
-        sales_data = cursor.fetchall()
-
-        conn.close()
-        return revenue_data, sales_data
+        """Fetches revenue and sales data from the daily rollup table."""
+        return fetch_daily_totals()
+
+    def on_show(self):
+        self.show_graph(self.graph_type)  # Redraws only if the data version moved on
+
+    def get_figure_canvas(self, layout):
+        """Creates each layout's Figure once and reuses it on every switch."""
+        if layout not in self.figure_canvases:
+            if layout == "all":
+                fig = Figure(figsize=(12, 10))
+                axes = fig.subplots(3, 2).flatten()  # 3 rows, 2 columns layout
+                axes[5].axis("off")  # Hide extra subplot
+            else:
+                fig = Figure(figsize=(10, 6))
+                fig.subplots()
+            self.figure_canvases[layout] = FigureCanvasTkAgg(fig, self.graph_frame)
+        return self.figure_canvases[layout]
 
     def show_graph(self, graph_type):
-        """Generates and displays the selected graph type."""
-        # Remove old graph
-        if self.current_canvas:
-            self.current_canvas.get_tk_widget().destroy()
-
-        revenue_data, sales_data = self.fetch_data()
-
-        # Extract Data
-        dates = [str(row[0]) for row in revenue_data]  # X-axis (Dates)
-        revenue_values = [float(row[1]) for row in revenue_data]  # Y-axis (Revenue ₹)
-        sales_values = [int(row[1]) for row in sales_data]  # Y-axis (Sales Count)
-        date_indices = range(len(dates))  # Use indices for setting xticks properly
-
-        # Create Figure for Graphs
-        if graph_type == "all":
-            fig, axes = plt.subplots(3, 2, figsize=(12, 10))  # 3 rows, 2 columns layout
-            axes = axes.flatten()  # Flatten 2D array to loop easily
-
-            # Graph 1: Revenue Trend
-            axes[0].plot(dates, revenue_values, marker='o', linestyle='-', color='green', linewidth=2)
-            axes[0].set_title("Revenue Trend Over Time")
-            axes[0].set_xticks(date_indices)  # Explicitly set tick positions
-            axes[0].set_xticklabels(dates, rotation=45, fontsize=8)
-            axes[0].set_ylabel("Revenue (₹)")
-            axes[0].grid(True)
-
-            # Graph 2: Sales Trend
-            axes[1].plot(dates, sales_values, marker='o', linestyle='-', color='blue', linewidth=2)
-            axes[1].set_title("Sales Trend Over Time")
-            axes[1].set_xticks(date_indices)
-            axes[1].set_xticklabels(dates, rotation=45, fontsize=8)
-            axes[1].set_ylabel("Total Parkings")
-            axes[1].grid(True)
-
-            # Graph 3: Pie Chart (Revenue Distribution)
-            axes[2].pie(revenue_values, labels=dates, autopct='%1.1f%%', startangle=140,
-                        colors=['#ff9999', '#66b3ff', '#99ff99', '#ffcc99'])
-            axes[2].set_title("Revenue Distribution")
-
-            # Graph 4: Scatter Plot (Revenue vs. Sales)
-            axes[3].scatter(revenue_values, sales_values, color='red')
-            axes[3].set_xlabel("Revenue (₹)")
-            axes[3].set_ylabel("Total Parkings")
-            axes[3].set_title("Revenue vs. Sales Correlation")
-            axes[3].grid(True)
-
-            # Graph 5: Revenue Growth
-            growth_values = [revenue_values[i] - revenue_values[i-1] if i > 0 else 0 for i in range(len(revenue_values))]
-            axes[4].bar(dates, growth_values, color='purple')
-            axes[4].set_title("Revenue Growth Per Day")
-            axes[4].set_xticks(date_indices)
-            axes[4].set_xticklabels(dates, rotation=45, fontsize=8)
-            axes[4].set_ylabel("Growth in ₹")
-            axes[4].grid(True)
-
-            # Hide extra subplot if there are empty slots in grid
-            axes[5].axis("off")
-
-            fig.tight_layout()  # Adjust layout to prevent overlapping
-
+        """Displays the selected graph type, redrawing only what changed.
+
+        Charts whose data is not cached yet show a placeholder and are filled
+        in by on_series_loaded once a worker has fetched their series.
+        """
+        self.graph_type = graph_type
+        layout = "all" if graph_type == "all" else "single"
+        figure_canvas = self.get_figure_canvas(layout)
+        axes = figure_canvas.figure.axes
+
+        changed = False
+        for ax, kind in zip(axes, ALL_GRAPHS if layout == "all" else (graph_type,)):
+            series = [cached_series(name) for name in CHART_SERIES[kind]]
+            if all(series):
+                changed |= self.draw_chart(ax, kind, self.chart_data(kind, series))
+            else:
+                changed |= self.draw_placeholder(ax, "Loading…")
+                for name, current in zip(CHART_SERIES[kind], series):
+                    if current is None:
+                        self.request_series(name)
+        if changed:
+            figure_canvas.figure.tight_layout()  # Adjust layout to prevent overlapping
+            figure_canvas.draw_idle()
+
+        if self.current_canvas is not figure_canvas:
+            if self.current_canvas:
+                self.current_canvas.get_tk_widget().pack_forget()
+            figure_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            self.current_canvas = figure_canvas
+
+    def request_series(self, name):
+        if name in self.inflight:
+            return
+        self.inflight.add(name)
+        self.executor.submit(load_series, lambda series: self.on_series_loaded(name),
+                             on_error=lambda err: self.on_series_failed(name, err),
+                             group=self, args=(name,))
+
+    def on_series_loaded(self, name):
+        self.inflight.discard(name)
+        self.show_graph(self.graph_type)
+
+    def on_series_failed(self, name, err):
+        self.inflight.discard(name)
+        figure_canvas = self.current_canvas
+        for ax in figure_canvas.figure.axes:
+            if self.drawn.get(ax, (None,))[0] == "placeholder":
+                self.draw_placeholder(ax, f"Error: {err}")
+        figure_canvas.draw_idle()
+
+    def chart_data(self, kind, series):
+        """Combines cached series into the dict draw_chart expects."""
+        length = min(len(s["values"]) for s in series)
+        data = {
+            "version": tuple(s["version"] for s in series),
+            "dates": series[0]["dates"][:length],
+        }
+        for name, s in zip(CHART_SERIES[kind], series):
+            data[name] = s["values"][:length]
+        if "revenue" in data:
+            revenue_values = data["revenue"]
+            data["growth"] = [revenue_values[i] - revenue_values[i-1] if i > 0 else 0 for i in range(len(revenue_values))]
+        return data
+
+    def draw_placeholder(self, ax, text):
+        if self.drawn.get(ax) == ("placeholder", text):
+            return False
+        ax.clear()
+        ax.set_axis_off()
+        ax.text(0.5, 0.5, text, ha="center", va="center", transform=ax.transAxes, fontsize=12, color="gray")
+        self.drawn[ax] = ("placeholder", text)
+        return True
+
+    def draw_chart(self, ax, kind, data):
+        """Draws one chart on an existing Axes; returns False if it was already current."""
+        drawn_kind, drawn_version = self.drawn.get(ax, (None, None))
+        if (drawn_kind, drawn_version) == (kind, data["version"]):
+            return False
+
+        dates = data["dates"]
+        date_indices = range(len(dates))
+
+        if drawn_kind == kind and kind in ("revenue", "sales"):
+            # Same chart, new data: update the line artist in place
+            ax.lines[0].set_data(date_indices, data[kind])
+            ax.set_xticks(date_indices)
+            ax.set_xticklabels(dates, rotation=45, fontsize=8)
+            ax.relim()
+            ax.autoscale_view()
+        elif drawn_kind == kind == "scatter":
+            ax.collections[0].set_offsets(list(zip(data["revenue"], data["sales"])))
+            ax.relim()
+            ax.autoscale_view()
         else:
-            fig, ax = plt.subplots(figsize=(10, 6))
-
-            if graph_type == "revenue":
-                ax.plot(dates, revenue_values, marker='o', linestyle='-', color='green', linewidth=2)
+            ax.clear()
+            ax.set_axis_on()
+            if kind == "revenue":
+                ax.plot(date_indices, data["revenue"], marker='o', linestyle='-', color='green', linewidth=2)
                 ax.set_title("Revenue Trend Over Time")
                 ax.set_xticks(date_indices)
                 ax.set_xticklabels(dates, rotation=45, fontsize=8)
                 ax.set_ylabel("Revenue (₹)")
                 ax.grid(True)
 
-            elif graph_type == "sales":
-                ax.plot(dates, sales_values, marker='o', linestyle='-', color='blue', linewidth=2)
+            elif kind == "sales":
+                ax.plot(date_indices, data["sales"], marker='o', linestyle='-', color='blue', linewidth=2)
                 ax.set_title("Sales Trend Over Time")
                 ax.set_xticks(date_indices)
                 ax.set_xticklabels(dates, rotation=45, fontsize=8)
                 ax.set_ylabel("Total Parkings")
                 ax.grid(True)
 
-            elif graph_type == "pie":
-                ax.pie(revenue_values, labels=dates, autopct='%1.1f%%', startangle=140,
-                       colors=['#ff9999', '#66b3ff', '#99ff99', '#ffcc99'])
+            elif kind == "pie":
+                ax.pie(data["revenue"], labels=dates, autopct='%1.1f%%', startangle=140, colors=PIE_COLORS)
                 ax.set_title("Revenue Distribution")
 
-            elif graph_type == "scatter":
-                ax.scatter(revenue_values, sales_values, color='red')
+            elif kind == "scatter":
+                ax.scatter(data["revenue"], data["sales"], color='red')
                 ax.set_xlabel("Revenue (₹)")
                 ax.set_ylabel("Total Parkings")
                 ax.set_title("Revenue vs. Sales Correlation")
                 ax.grid(True)
 
-            elif graph_type == "growth":
-                growth_values = [revenue_values[i] - revenue_values[i-1] if i > 0 else 0 for i in range(len(revenue_values))]
-                ax.bar(dates, growth_values, color='purple')
+            elif kind == "growth":
+                ax.bar(date_indices, data["growth"], color='purple')
                 ax.set_title("Revenue Growth Per Day")
                 ax.set_xticks(date_indices)
                 ax.set_xticklabels(dates, rotation=45, fontsize=8)
                 ax.set_ylabel("Growth in ₹")
                 ax.grid(True)
 
-        # Embed Matplotlib Figure into Tkinter
-        self.current_canvas = FigureCanvasTkAgg(fig, self.graph_frame)
-        self.current_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        self.current_canvas.draw()
+        self.drawn[ax] = (kind, data["version"])
+        return True
 
 # Example Usage
 if __name__ == "__main__":
@@ -1,11 +1,16 @@
+import startup
+import sys
+from functools import lru_cache
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
 import tkinter.font as tkFont
 from datetime import datetime
-import time
-from db_connection import connect_to_db
-from Main import AdminPanel
+from background import get_executor
+from router import Router
+from scheduler import get_scheduler
+from startup import lazy_import
+
+LOGIN_QUERY = "SELECT * FROM tbl_login WHERE username=%s AND password=%s AND status='Active'"
 
 class ModernButton(tk.Frame):
     def __init__(self, parent, text, command, bg_color="#010f26", hover_color="#3b82f6", 
@@ -45,15 +50,25 @@ class AnimatedCounter(tk.Frame):
                              fg="#4b5563", bg=parent.cget('bg'))
         self.label.pack()
         
-        self.animate()
+        self.animation = None
+        self.set_target(target_value)
     
+    def set_target(self, target_value):
+        """Counts from the shown value to a new one."""
+        self.target = target_value
+        if self.animation is None and self.current != self.target:
+            self.animation = get_scheduler(self).every(self, 50, self.animate)
+
     def animate(self):
+        step = max(1, abs(self.target - self.current) // 20, self.target // 20)
         if self.current < self.target:
-            self.current += max(1, self.target // 20)
-            if self.current > self.target:
-                self.current = self.target
-            self.value_label.config(text=str(self.current))
-            self.after(50, self.animate)
+            self.current = min(self.target, self.current + step)
+        else:
+            self.current = max(self.target, self.current - step)
+        self.value_label.config(text=str(self.current))
+        if self.current == self.target:
+            self.animation = None
+            return False
 
 class DigitalClock(tk.Frame):
     def __init__(self, parent):
@@ -68,6 +83,7 @@ class DigitalClock(tk.Frame):
         self.date_label.pack()
         
         self.update_time()
+        get_scheduler(self).every(self, 1000, self.update_time)
     
     def update_time(self):
         now = datetime.now()
@@ -76,29 +92,43 @@ class DigitalClock(tk.Frame):
         
         self.time_label.config(text=time_str)
         self.date_label.config(text=date_str)
-        
-        self.after(1000, self.update_time)
+
+@lru_cache(maxsize=8)
+def gradient_image(width, height, color1, color2):
+    """Builds a vertical gradient as one PhotoImage from a raw PPM (no NumPy before first paint)."""
+    start = [int(color1[i:i + 2], 16) for i in (1, 3, 5)]
+    end = [int(color2[i:i + 2], 16) for i in (1, 3, 5)]
+    pixels = bytearray()
+    for y in range(height):
+        ratio = y / height
+        pixel = bytes(int((1 - ratio) * a + ratio * b) for a, b in zip(start, end))
+        pixels += pixel * width
+    header = f"P6 {width} {height} 255\n".encode("ascii")
+    return tk.PhotoImage(data=bytes(header + pixels), format="PPM")
 
 class GradientFrame(tk.Canvas):
     def __init__(self, parent, color1="#010f26", color2="#1e40af", width=800, height=400):
         super().__init__(parent, width=width, height=height, highlightthickness=0)
-        
-        for i in range(height):
-            ratio = i / height
-            r = int((1-ratio) * int(color1[1:3], 16) + ratio * int(color2[1:3], 16))
-            g = int((1-ratio) * int(color1[3:5], 16) + ratio * int(color2[3:5], 16))
-            b = int((1-ratio) * int(color1[5:7], 16) + ratio * int(color2[5:7], 16))
-            
-            color = f"#{r:02x}{g:02x}{b:02x}"
-            self.create_line(0, i, width, i, fill=color)
+        self.colors = (color1, color2)
+        self.size = (width, height)
 
-class IndexPage(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("SmartPark - Professional Parking Management")
-        self.geometry("1400x800")
-        self.state("zoomed")
-        self.configure(bg="#f9fafb")
+        # A single image item, drawn beneath any text added later
+        self.image = gradient_image(width, height, color1, color2)
+        self.image_item = self.create_image(0, 0, anchor="nw", image=self.image)
+        self.bind("<Configure>", self.on_resize)
+
+    def on_resize(self, event):
+        size = (event.width, event.height)
+        if size != self.size and event.width > 1 and event.height > 1:
+            self.size = size
+            self.image = gradient_image(event.width, event.height, *self.colors)
+            self.itemconfigure(self.image_item, image=self.image)
+
+class IndexPage(tk.Frame):
+    def __init__(self, parent, router):
+        super().__init__(parent, bg="#f9fafb")
+        self.pack(fill="both", expand=True)
+        self.router = router
         
         self.title_font = tkFont.Font(family="Helvetica", size=36, weight="bold")
         self.subtitle_font = tkFont.Font(family="Helvetica", size=18)
@@ -306,18 +336,51 @@ class IndexPage(tk.Tk):
         stats_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
         
         stats_data = [
-            ("Total Parking Spots", 500, "#22c55e"),
-            ("Available Now", 127, "#3b82f6"),
-            ("Daily Users", 1250, "#f59e0b"),
-            ("Monthly Revenue", 85000, "#dc2626"),
+            ("Total Parking Spots", "#22c55e"),
+            ("Available Now", "#3b82f6"),
+            ("Check-ins Today", "#f59e0b"),
+            ("Revenue This Month", "#dc2626"),
         ]
         
-        for i, (label, value, color) in enumerate(stats_data):
+        self.stat_counters = []
+        for i, (label, color) in enumerate(stats_data):
             stat_card = tk.Frame(stats_frame, bg="white", relief="raised", bd=3, padx=40, pady=30)
             stat_card.grid(row=0, column=i, padx=20, pady=20, sticky="nsew")
             
-            counter = AnimatedCounter(stat_card, label, value, color)
+            counter = AnimatedCounter(stat_card, label, 0, color)
             counter.pack()
+            self.stat_counters.append(counter)
+
+        self.stats_error = tk.Label(main_frame, text="", font=("Helvetica", 12), fg="red", bg="#f9fafb")
+        self.stats_error.pack()
+
+        counters = self.stat_counters
+        when_migrated(self, lambda: get_scheduler(self).every(
+            stats_frame, lazy_import("stats").STATS_TTL * 1000,
+            lambda: self.refresh_statistics(counters), immediate=True))
+
+    def refresh_statistics(self, counters):
+        """Feeds the cards from the shared cache, querying off the Tk thread when it is stale."""
+        stats = lazy_import("stats")
+        cached = stats.cached_statistics()
+        if cached is not None:
+            self.show_statistic_values(counters, cached)
+        else:
+            get_executor(self).submit(stats.live_statistics,
+                                      lambda values: self.show_statistic_values(counters, values),
+                                      lambda err: self.show_statistics_error(counters, err), group=self)
+
+    def show_statistics_error(self, counters, err):
+        # The cards keep their last figures; say they are stale
+        if counters[0].winfo_exists():
+            self.stats_error.config(text=f"Could not refresh statistics: {err}")
+
+    def show_statistic_values(self, counters, values):
+        if not counters[0].winfo_exists():
+            return
+        self.stats_error.config(text="")
+        for counter, value in zip(counters, values):
+            counter.set_target(value)
 
     def show_services(self):
         for widget in self.content_frame.winfo_children():
@@ -362,7 +425,7 @@ class IndexPage(tk.Tk):
         login_window.configure(bg="#f9fafb")
         login_window.resizable(False, False)
         
-        login_window.transient(self)
+        login_window.transient(self.winfo_toplevel())
         login_window.grab_set()
         
         header_frame = tk.Frame(login_window, bg="#010f26", height=80)
@@ -395,19 +458,15 @@ class IndexPage(tk.Tk):
                 return
 
             try:
-                db = connect_to_db()
-                cursor = db.cursor()
-                cursor.execute("SELECT * FROM tbl_login WHERE username=%s AND password=%s AND status='Active'", 
-                             (username, password))
-                user = cursor.fetchone()
-                db.close()
+                with lazy_import("db_connection").db_connection() as db:
+                    cursor = db.cursor()
+                    cursor.execute(LOGIN_QUERY, (username, password))
+                    user = cursor.fetchone()
 
                 if user:
                     messagebox.showinfo("Success", "Login successful. Accessing Admin Panel...")
                     login_window.destroy()
-                    self.destroy()
-                    app = AdminPanel()
-                    app.mainloop()
+                    self.router.show("admin")
                 else:
                     messagebox.showerror("Error", "Invalid credentials or inactive account.")
             except Exception as e:
@@ -415,7 +474,7 @@ class IndexPage(tk.Tk):
         
         login_btn = tk.Button(form_frame, text="LOGIN", font=("Helvetica", 12, "bold"),
                             bg="#010f26", fg="white", relief="flat", cursor="hand2",
-                            command=check_login, pady=12)
+                            command=lambda: when_migrated(self, check_login), pady=12)
         login_btn.pack(fill="x")
         
         def on_enter(e):
@@ -428,6 +487,111 @@ class IndexPage(tk.Tk):
         
         username_entry.focus()
 
+def create_app(start="index"):
+    """Builds the single Tk root and its top-level router (landing page and admin panel)."""
+    root = tk.Tk()
+    root.title("SmartPark - Professional Parking Management")
+    root.geometry("1400x800")
+    root.state("zoomed")
+
+    root.router = Router(root)
+    root.router.register("index", lambda frame: IndexPage(frame, root.router),
+                         title="SmartPark - Professional Parking Management")
+    # The admin panel (and matplotlib with it) is only imported on login
+    root.router.register("admin", lambda frame: lazy_import("Main").AdminPanel(frame, root.router),
+                         title="Vehicle Parking Management System")
+    # Pending migrations are applied off the Tk thread once the first page
+    # is up. Anything that queries the database waits for them: the landing
+    # page only does so through when_migrated(), other start pages are built
+    # afterwards, and the sweeper starts then too.
+    root.migrated = False
+    root.migration_error = None
+    root.after_migrations = [lambda: lazy_import("sweeper").schedule(root)]
+    root.pending_actions = []
+    root.waiting = None
+    if start == "index":
+        root.router.show(start)
+    else:
+        root.waiting = tk.Frame(root)
+        root.waiting.pack(expand=True)
+        root.waiting_label = tk.Label(root.waiting, text="Preparing the database...", font=("Helvetica", 16))
+        root.waiting_label.pack(pady=10)
+        root.after_migrations.insert(0, lambda: (root.waiting.destroy(), root.router.show(start)))
+
+    root.after_idle(lambda: start_migrations(root))
+    return root
+
+def start_migrations(root):
+    root.migration_error = None
+    if root.waiting is not None:
+        for widget in root.waiting.winfo_children()[1:]:
+            widget.destroy()
+        root.waiting_label.config(text="Preparing the database...")
+    get_executor(root).submit(run_migrations, lambda result: on_migrated(root),
+                              lambda err: on_migrations_failed(root, err))
+
+def on_migrated(root):
+    root.migrated = True
+    callbacks = root.after_migrations + root.pending_actions
+    root.after_migrations, root.pending_actions = [], []
+    for callback in callbacks:
+        callback()
+
+def on_migrations_failed(root, err):
+    root.migration_error = err
+    if messagebox.askretrycancel("Database Error", f"Could not apply database migrations: {err}"):
+        start_migrations(root)
+        return
+    # Actions queued meanwhile (e.g. login clicks) are dropped; trying them
+    # again asks to retry the migrations first
+    root.pending_actions = []
+    if root.waiting is not None:
+        root.waiting_label.config(text=f"Could not prepare the database: {err}")
+        tk.Button(root.waiting, text="Retry", font=("Helvetica", 12, "bold"),
+                  command=lambda: start_migrations(root)).pack()
+
+def when_migrated(widget, callback):
+    """Runs callback on the Tk thread once the schema is migrated (right away if it already is).
+
+    If the migrations failed, the error is shown and the callback only
+    runs when a retry the user asks for succeeds.
+    """
+    root = widget._root()
+    if root.migrated:
+        callback()
+        return
+    if root.migration_error is not None:
+        if not messagebox.askretrycancel("Database Error",
+                                         f"The database is not ready: {root.migration_error}"):
+            return
+        start_migrations(root)
+    root.pending_actions.append(callback)
+
+def run_migrations():
+    lazy_import("migrations").ensure_migrated()
+
 if __name__ == "__main__":
-    app = IndexPage()
-    app.mainloop()
\ No newline at end of file
+    startup.enabled = "--startup-report" in sys.argv
+    app = create_app()
+    paint_ms = startup.first_paint_ms(app)
+
+    if "--check-startup-budget" in sys.argv:
+        args = sys.argv[sys.argv.index("--check-startup-budget") + 1:]
+        budget_ms = startup.STARTUP_BUDGET_MS
+        if args and not args[0].startswith("--"):
+            try:
+                budget_ms = float(args[0])
+            except ValueError:
+                print(f"Invalid startup budget: {args[0]!r} (expected milliseconds)", file=sys.stderr)
+                app.destroy()
+                sys.exit(2)
+        print(f"Time to first paint: {paint_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+        app.destroy()
+        sys.exit(0 if paint_ms <= budget_ms else 1)
+
+    app.mainloop()
+
+    if "--tick-report" in sys.argv:
+        report = get_scheduler(app).report()
+        print(f"Ticks: {report['ticks']} ({report['runs']} job runs), "
+              f"total {report['total_ms']:.1f} ms, worst {report['max_ms']:.2f} ms", file=sys.stderr)
\ No newline at end of file
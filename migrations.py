@@ -0,0 +1,284 @@
+import threading
+
+import mysql.connector
+
+from db_connection import db_connection
+from rollup import REBUILD_STATEMENTS
+
+# Each migration is applied once, in list order, and recorded in
+# tbl_schema_migrations. Never edit a migration that has shipped; append a
+# new one instead.
+MIGRATIONS = [
+    ("0001_base_tables", [
+        """
+        CREATE TABLE IF NOT EXISTS tbl_login (
+            login_id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Active'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tbl_slots (
+            slot_id INT AUTO_INCREMENT PRIMARY KEY,
+            slotname VARCHAR(50) NOT NULL,
+            fare DECIMAL(10, 2) NOT NULL,
+            number_of_slots INT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Active'
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tbl_parking (
+            park_id INT AUTO_INCREMENT PRIMARY KEY,
+            custname VARCHAR(100) NOT NULL,
+            veh_no VARCHAR(20) NOT NULL,
+            contact_no VARCHAR(15) NOT NULL,
+            aadhar_no VARCHAR(12) NOT NULL,
+            entry_time DATETIME NOT NULL,
+            date DATE NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            slot_id INT NOT NULL,
+            slot_number INT NOT NULL,
+            exit_time DATETIME NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tbl_payment (
+            pay_id INT AUTO_INCREMENT PRIMARY KEY,
+            park_id INT NOT NULL,
+            amount DECIMAL(10, 2) NOT NULL DEFAULT 0,
+            ticket_number VARCHAR(20) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Pending'
+        )
+        """,
+    ]),
+    ("0002_ticket_sequence", [
+        """
+        CREATE TABLE IF NOT EXISTS tbl_sequence (
+            name VARCHAR(32) PRIMARY KEY,
+            next_value BIGINT NOT NULL
+        )
+        """,
+    ]),
+    ("0003_parking_board", [
+        """
+        ALTER TABLE tbl_parking
+            ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        """,
+        "CREATE INDEX idx_parking_status ON tbl_parking (status)",
+        "CREATE INDEX idx_parking_updated_at ON tbl_parking (updated_at)",
+    ]),
+    ("0004_daily_rollup", [
+        """
+        CREATE TABLE IF NOT EXISTS tbl_daily_rollup (
+            date DATE NOT NULL,
+            slot_id INT NOT NULL,
+            revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            parkings INT NOT NULL DEFAULT 0,
+            paid INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, slot_id)
+        )
+        """,
+    ] + REBUILD_STATEMENTS),
+    ("0005_hot_path_indexes", [
+        "CREATE INDEX idx_parking_slot_status ON tbl_parking (slot_id, status, slot_number)",
+        "CREATE INDEX idx_parking_date ON tbl_parking (date)",
+        "CREATE INDEX idx_payment_park_id ON tbl_payment (park_id)",
+        "CREATE INDEX idx_payment_ticket_number ON tbl_payment (ticket_number)",
+        "CREATE INDEX idx_login_username ON tbl_login (username)",
+        """
+        ALTER TABLE tbl_parking
+            ADD COLUMN hours_parked INT
+                AS (TIMESTAMPDIFF(HOUR, entry_time, exit_time)) STORED
+        """,
+    ]),
+    ("0006_overstay", [
+        "ALTER TABLE tbl_parking ADD COLUMN overstay_hours INT NOT NULL DEFAULT 0",
+        "CREATE INDEX idx_parking_status_exit ON tbl_parking (status, exit_time)",
+    ]),
+    ("0007_check_in_procedure", [
+        "DROP PROCEDURE IF EXISTS sp_check_in",
+        # Writes the parking, its payment and the rollup in one transaction
+        # and returns everything the payment page shows, so a check-in is a
+        # single CALL.
+        """
+        CREATE PROCEDURE sp_check_in(
+            IN p_custname VARCHAR(100), IN p_veh_no VARCHAR(20), IN p_contact_no VARCHAR(15),
+            IN p_aadhar_no VARCHAR(12), IN p_slot_id INT, IN p_slot_number INT,
+            IN p_hours INT, IN p_ticket_number VARCHAR(20), IN p_default_fare DECIMAL(10, 2))
+        BEGIN
+            DECLARE v_park_id INT;
+            DECLARE v_amount DECIMAL(10, 2);
+            DECLARE EXIT HANDLER FOR SQLEXCEPTION
+            BEGIN
+                ROLLBACK;
+                RESIGNAL;
+            END;
+
+            START TRANSACTION;
+            SELECT COALESCE(MAX(fare), p_default_fare) * p_hours INTO v_amount
+            FROM tbl_slots WHERE slot_id = p_slot_id;
+
+            INSERT INTO tbl_parking
+                (custname, veh_no, contact_no, aadhar_no, entry_time, date, status, slot_id, slot_number, exit_time)
+            VALUES (p_custname, p_veh_no, p_contact_no, p_aadhar_no, NOW(), NOW(), 'Parked',
+                    p_slot_id, p_slot_number, DATE_ADD(NOW(), INTERVAL p_hours HOUR));
+            SET v_park_id = LAST_INSERT_ID();
+
+            INSERT INTO tbl_payment (park_id, amount, ticket_number) VALUES (v_park_id, v_amount, p_ticket_number);
+
+            INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+            SELECT date, slot_id, v_amount, 1, 0 FROM tbl_parking WHERE park_id = v_park_id
+            ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue), parkings = parkings + 1;
+            COMMIT;
+
+            SELECT park_id, p_ticket_number, v_amount, entry_time, exit_time, hours_parked
+            FROM tbl_parking WHERE park_id = v_park_id;
+        END
+        """,
+    ]),
+    ("0008_tariffs", [
+        "ALTER TABLE tbl_slots ADD COLUMN daily_cap DECIMAL(10, 2) NULL",
+        """
+        CREATE TABLE IF NOT EXISTS tbl_tariff_tiers (
+            slot_id INT NOT NULL,
+            from_hour INT NOT NULL,
+            rate DECIMAL(10, 2) NOT NULL,
+            PRIMARY KEY (slot_id, from_hour)
+        )
+        """,
+        # The amount is now priced by the tariff engine and passed in.
+        "DROP PROCEDURE IF EXISTS sp_check_in",
+        """
+        CREATE PROCEDURE sp_check_in(
+            IN p_custname VARCHAR(100), IN p_veh_no VARCHAR(20), IN p_contact_no VARCHAR(15),
+            IN p_aadhar_no VARCHAR(12), IN p_slot_id INT, IN p_slot_number INT,
+            IN p_hours INT, IN p_ticket_number VARCHAR(20), IN p_amount DECIMAL(10, 2))
+        BEGIN
+            DECLARE v_park_id INT;
+            DECLARE EXIT HANDLER FOR SQLEXCEPTION
+            BEGIN
+                ROLLBACK;
+                RESIGNAL;
+            END;
+
+            START TRANSACTION;
+            INSERT INTO tbl_parking
+                (custname, veh_no, contact_no, aadhar_no, entry_time, date, status, slot_id, slot_number, exit_time)
+            VALUES (p_custname, p_veh_no, p_contact_no, p_aadhar_no, NOW(), NOW(), 'Parked',
+                    p_slot_id, p_slot_number, DATE_ADD(NOW(), INTERVAL p_hours HOUR));
+            SET v_park_id = LAST_INSERT_ID();
+
+            INSERT INTO tbl_payment (park_id, amount, ticket_number) VALUES (v_park_id, p_amount, p_ticket_number);
+
+            INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+            SELECT date, slot_id, p_amount, 1, 0 FROM tbl_parking WHERE park_id = v_park_id
+            ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue), parkings = parkings + 1;
+            COMMIT;
+
+            SELECT park_id, p_ticket_number, p_amount, entry_time, exit_time, hours_parked
+            FROM tbl_parking WHERE park_id = v_park_id;
+        END
+        """,
+    ]),
+    ("0009_rollup_updated_at", [
+        # Every rollup write (including sp_check_in's) moves MAX(updated_at),
+        # which caches in any process compare against.
+        """
+        ALTER TABLE tbl_daily_rollup
+            ADD COLUMN updated_at TIMESTAMP(6) NOT NULL
+                DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+        """,
+        "CREATE INDEX idx_rollup_updated_at ON tbl_daily_rollup (updated_at)",
+    ]),
+]
+
+# Every process runs migrate() at start-up; the named lock makes gates
+# starting together apply them one at a time.
+MIGRATION_LOCK = "vehicle_schema_migrations"
+LOCK_TIMEOUT_S = 120
+# DDL commits on its own, so a statement can have been applied without its
+# step being recorded; these errors mean exactly that.
+ALREADY_APPLIED_ERRORS = {
+    1050,  # table already exists
+    1060,  # duplicate column name
+    1061,  # duplicate key name
+    1304,  # procedure already exists
+}
+
+_migrated = False
+_migrate_lock = threading.Lock()
+
+
+def apply_step(cursor, statement):
+    try:
+        cursor.execute(statement)
+    except mysql.connector.Error as err:
+        if err.errno not in ALREADY_APPLIED_ERRORS:
+            raise
+
+
+def migrate():
+    """Applies pending migrations and returns the ids that were applied.
+
+    Progress is recorded per statement, so a migration that failed part-way
+    resumes after its last applied statement on the next run.
+    """
+    applied_now = []
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, LOCK_TIMEOUT_S))
+        if cursor.fetchone()[0] != 1:
+            raise TimeoutError("Timed out waiting for another process to finish the migrations")
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tbl_schema_migrations (
+                    id VARCHAR(64) PRIMARY KEY,
+                    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tbl_schema_migration_steps (
+                    id VARCHAR(64) NOT NULL,
+                    step INT NOT NULL,
+                    PRIMARY KEY (id, step)
+                )
+            """)
+            cursor.execute("SELECT id FROM tbl_schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            cursor.execute("SELECT id, step FROM tbl_schema_migration_steps")
+            steps_done = set(cursor.fetchall())
+
+            for migration_id, statements in MIGRATIONS:
+                if migration_id in applied:
+                    continue
+                for step, statement in enumerate(statements):
+                    if (migration_id, step) in steps_done:
+                        continue
+                    apply_step(cursor, statement)
+                    cursor.execute("INSERT INTO tbl_schema_migration_steps (id, step) VALUES (%s, %s)",
+                                   (migration_id, step))
+                    conn.commit()
+                cursor.execute("INSERT INTO tbl_schema_migrations (id) VALUES (%s)", (migration_id,))
+                cursor.execute("DELETE FROM tbl_schema_migration_steps WHERE id = %s", (migration_id,))
+                conn.commit()
+                applied_now.append(migration_id)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+    return applied_now
+
+
+def ensure_migrated():
+    """Runs migrate() once per process."""
+    global _migrated
+    with _migrate_lock:
+        if not _migrated:
+            migrate()
+            _migrated = True
+
+
+if __name__ == "__main__":
+    applied = migrate()
+    print("Applied: " + ", ".join(applied) if applied else "Schema is up to date.")
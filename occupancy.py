@@ -0,0 +1,162 @@
+import threading
+
+from db_connection import db_connection
+
+SLOT_CATEGORIES_QUERY = "SELECT slot_id, slotname, number_of_slots FROM tbl_slots"
+ACTIVE_BAYS_QUERY = "SELECT park_id, slot_id, slot_number FROM tbl_parking WHERE status = 'Parked'"
+
+
+class SlotBitmap:
+    """Bitset of occupied bays for one slot category (bay numbers start at 1)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.bits = bytearray((capacity + 7) // 8)
+        self.occupied = 0
+
+    def is_set(self, slot_number):
+        index = slot_number - 1
+        if not 0 <= index < self.capacity:
+            return False
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def set(self, slot_number):
+        index = slot_number - 1
+        if not 0 <= index < self.capacity or self.is_set(slot_number):
+            return False
+        self.bits[index >> 3] |= 1 << (index & 7)
+        self.occupied += 1
+        return True
+
+    def clear(self, slot_number):
+        if not self.is_set(slot_number):
+            return False
+        index = slot_number - 1
+        self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+        self.occupied -= 1
+        return True
+
+    def resize(self, capacity):
+        if capacity < self.capacity:
+            for slot_number in range(capacity + 1, self.capacity + 1):
+                self.clear(slot_number)
+        self.bits = self.bits[:(capacity + 7) // 8].ljust((capacity + 7) // 8, b"\0")
+        self.capacity = capacity
+
+    def free_slots(self, limit=None):
+        """Yields free bay numbers in ascending order."""
+        found = 0
+        for byte_index, byte in enumerate(self.bits):
+            if byte == 0xFF:
+                continue
+            for bit in range(8):
+                slot_number = byte_index * 8 + bit + 1
+                if slot_number > self.capacity:
+                    return
+                if not byte & (1 << bit):
+                    yield slot_number
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+
+
+class OccupancyIndex:
+    """In-memory occupancy of every slot category.
+
+    Loaded once from the active parkings and then kept current by the code
+    paths that park and release vehicles, so the slot layout never has to
+    rescan tbl_parking. It also remembers the active park_id of every
+    occupied bay so exits can be keyed on it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._bitmaps = {}
+        self._names = {}
+        self._park_ids = {}
+        self._loaded = False
+
+    def load(self):
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(SLOT_CATEGORIES_QUERY)
+            categories = cursor.fetchall()
+            cursor.execute(ACTIVE_BAYS_QUERY)
+            parked = cursor.fetchall()
+
+        with self._lock:
+            self._bitmaps = {slot_id: SlotBitmap(number_of_slots) for slot_id, _, number_of_slots in categories}
+            self._names = {slot_id: slotname for slot_id, slotname, _ in categories}
+            self._park_ids = {}
+            for park_id, slot_id, slot_number in parked:
+                if slot_id in self._bitmaps and self._bitmaps[slot_id].set(slot_number):
+                    self._park_ids[slot_id, slot_number] = park_id
+            self._loaded = True
+
+    def ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    def category(self, slot_id):
+        """Returns (slotname, capacity) or None for an unknown category."""
+        with self._lock:
+            if slot_id not in self._bitmaps:
+                return None
+            return self._names[slot_id], self._bitmaps[slot_id].capacity
+
+    def set_category(self, slot_id, slotname, capacity):
+        with self._lock:
+            self._names[slot_id] = slotname
+            if slot_id in self._bitmaps:
+                self._bitmaps[slot_id].resize(capacity)
+                for key in [key for key in self._park_ids if key[0] == slot_id and key[1] > capacity]:
+                    del self._park_ids[key]
+            else:
+                self._bitmaps[slot_id] = SlotBitmap(capacity)
+
+    def is_occupied(self, slot_id, slot_number):
+        with self._lock:
+            bitmap = self._bitmaps.get(slot_id)
+            return bitmap is not None and bitmap.is_set(slot_number)
+
+    def park_id(self, slot_id, slot_number):
+        """Returns the park_id of the vehicle in a bay, or None."""
+        with self._lock:
+            return self._park_ids.get((slot_id, slot_number))
+
+    def occupy(self, slot_id, slot_number, park_id=None):
+        with self._lock:
+            bitmap = self._bitmaps.get(slot_id)
+            if bitmap is None or not bitmap.set(slot_number):
+                return False
+            if park_id is not None:
+                self._park_ids[slot_id, slot_number] = park_id
+            return True
+
+    def release(self, slot_id, slot_number):
+        with self._lock:
+            self._park_ids.pop((slot_id, slot_number), None)
+            bitmap = self._bitmaps.get(slot_id)
+            return bitmap is not None and bitmap.clear(slot_number)
+
+    def counts(self, slot_id):
+        """Returns (free, total) for a category."""
+        with self._lock:
+            bitmap = self._bitmaps.get(slot_id)
+            if bitmap is None:
+                return 0, 0
+            return bitmap.capacity - bitmap.occupied, bitmap.capacity
+
+    def free_slots(self, slot_id, limit=None):
+        with self._lock:
+            bitmap = self._bitmaps.get(slot_id)
+            return list(bitmap.free_slots(limit)) if bitmap is not None else []
+
+
+_index = OccupancyIndex()
+
+
+def get_occupancy_index():
+    _index.ensure_loaded()
+    return _index
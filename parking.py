@@ -1,16 +1,99 @@
-import datetime
-import re
 import tkinter as tk
-from tkinter import messagebox, ttk
-from db_connection import connect_to_db
-from payment import PaymentPage
+from tkinter import filedialog, messagebox, ttk
+from background import get_executor
+from checkin import check_in, import_csv_file, validate_parking
+from db_connection import db_connection
+from plates import get_plate_index
+from scheduler import get_scheduler
+from ticket_allocator import next_ticket_number
+
+PARKING_COLUMNS = "park_id, custname, veh_no, contact_no, aadhar_no, entry_time, exit_time, status, slot_number, updated_at"
+STATUS_FILTERS = ("Parked", "Exited", "All")
+HISTORY_LIMIT = 1000
+REFRESH_INTERVAL_MS = 5000
+
+
+def build_parking_filter(date_from=None, date_to=None, slot_id=None, slot_number=None):
+    """Returns WHERE clauses and params for the server-side board filters."""
+    clauses, params = [], []
+    if date_from:
+        clauses.append("date >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("date <= %s")
+        params.append(date_to)
+    if slot_id:
+        clauses.append("slot_id = %s")
+        params.append(slot_id)
+    if slot_number:
+        clauses.append("slot_number = %s")
+        params.append(slot_number)
+    return clauses, params
+
+
+HIGH_WATER_MARK_QUERY = "SELECT updated_at, park_id FROM tbl_parking ORDER BY updated_at DESC, park_id DESC LIMIT 1"
+
+
+def parking_entries_query(status="Parked", **filters):
+    """Returns (sql, params) for the board rows matching a status and the filters."""
+    clauses, params = build_parking_filter(**filters)
+    if status != "All":
+        clauses.insert(0, "status = %s")
+        params.insert(0, status)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # The active board is small; history is capped to the newest rows.
+    limit = "" if status == "Parked" else f"ORDER BY park_id DESC LIMIT {HISTORY_LIMIT}"
+    return f"SELECT {PARKING_COLUMNS} FROM tbl_parking {where} {limit}", tuple(params)
+
+
+def parking_changes_query(high_water_mark, **filters):
+    """Returns (sql, params) for the rows inserted or updated after the (updated_at, park_id) mark."""
+    clauses, params = build_parking_filter(**filters)
+    if high_water_mark:
+        updated_at, park_id = high_water_mark
+        clauses.insert(0, "(updated_at > %s OR (updated_at = %s AND park_id > %s))")
+        params[0:0] = [updated_at, updated_at, park_id]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {PARKING_COLUMNS} FROM tbl_parking {where} ORDER BY updated_at, park_id", tuple(params)
+
+
+def fetch_parking_entries(status="Parked", **filters):
+    """Loads the board for a filter and the high-water mark to refresh from.
+
+    The mark is the newest (updated_at, park_id) in the whole table, read
+    first so that nothing written while the board loads is missed.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(HIGH_WATER_MARK_QUERY)
+        high_water_mark = cursor.fetchone()
+        cursor.execute(*parking_entries_query(status, **filters))
+        rows = cursor.fetchall()
+
+    rows.sort(key=lambda row: row[0])
+    return rows, high_water_mark
+
+
+def fetch_parking_changes(high_water_mark, **filters):
+    """Fetches rows inserted or updated after the (updated_at, park_id) mark."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(*parking_changes_query(high_water_mark, **filters))
+        return cursor.fetchall()
+
 
 class ParkingPage:
-    def __init__(self, root, slot_id=None, slot_number=None):
+    def __init__(self, root, router, slot_id=None, slot_number=None):
         self.root = root
+        self.router = router
         self.slot_id = slot_id
         self.slot_number = slot_number
-        self.root.attributes('-fullscreen', True)
+        self.restore_fullscreen = None
+        self.executor = get_executor(self.root)
+        self.board_generation = 0
+        self.board_busy = self.board_loaded = False
+        self.high_water_mark = None
+        self.enter_fullscreen()
         self.root.configure(bg="#EAF2F8")
         self.build_page()
 
@@ -19,10 +102,30 @@ class ParkingPage:
             font=("Arial", 12, "bold"), bg="#E74C3C", fg="white",
             activebackground="#C0392B", activeforeground="white",
             relief="raised", bd=3, padx=15, pady=8,
-            command=lambda: self.root.attributes('-fullscreen', False)
+            command=lambda: self.root.winfo_toplevel().attributes('-fullscreen', False)
         )
         exit_btn.pack(pady=15)
 
+    def on_show(self, slot_id=None, slot_number=None):
+        """Re-targets the kept page at the bay picked on the slot layout."""
+        self.enter_fullscreen()
+        if (slot_id, slot_number) != (self.slot_id, self.slot_number):
+            self.slot_id = slot_id
+            self.slot_number = slot_number
+            self.load_parking_entries()
+
+    def enter_fullscreen(self):
+        """Takes the shared window fullscreen, remembering how to hand it back."""
+        toplevel = self.root.winfo_toplevel()
+        if self.restore_fullscreen is None:
+            self.restore_fullscreen = bool(int(toplevel.attributes('-fullscreen')))
+        toplevel.attributes('-fullscreen', True)
+
+    def on_hide(self):
+        if self.restore_fullscreen is not None:
+            self.root.winfo_toplevel().attributes('-fullscreen', self.restore_fullscreen)
+            self.restore_fullscreen = None
+
     def build_page(self):
         tk.Label(self.root, text="Parking Management", font=("Arial", 18, "bold"),
                  bg="#010f26", fg="white", pady=10).pack(fill=tk.X)
@@ -41,13 +144,64 @@ class ParkingPage:
 
         self.parking_table.tag_configure("oddrow", background="#f9f9f9")
         self.parking_table.tag_configure("evenrow", background="white")
+
+        self.build_filter_bar()
         self.parking_table.pack(pady=10, padx=10)
 
         self.load_parking_entries()
+        get_scheduler(self.root).every(self.parking_table, REFRESH_INTERVAL_MS, self.refresh_parking_entries)
 
-        tk.Button(self.root, text="➕ Add Parking", font=("Arial", 14, "bold"),
+        button_frame = tk.Frame(self.root, bg="#EAF2F8")
+        button_frame.pack(pady=20)
+        tk.Button(button_frame, text="➕ Add Parking", font=("Arial", 14, "bold"),
                   bg="#27AE60", fg="white", padx=15, pady=10, activebackground="#229954",
-                  command=self.show_add_parking_form).pack(pady=20)
+                  command=self.show_add_parking_form).pack(side=tk.LEFT, padx=10)
+        self.import_button = tk.Button(button_frame, text="📥 Import CSV", font=("Arial", 14, "bold"),
+                                       bg="#8E44AD", fg="white", padx=15, pady=10, activebackground="#7D3C98",
+                                       command=self.import_csv)
+        self.import_button.pack(side=tk.LEFT, padx=10)
+
+    def build_filter_bar(self):
+        filter_frame = tk.Frame(self.root, bg="#EAF2F8")
+        filter_frame.pack(pady=(10, 0))
+
+        self.filter_vars = {
+            "status": tk.StringVar(value="Parked"),
+            "date_from": tk.StringVar(),
+            "date_to": tk.StringVar(),
+            "slot_number": tk.StringVar(),
+        }
+
+        tk.Label(filter_frame, text="Status", font=("Arial", 11, "bold"), bg="#EAF2F8").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(filter_frame, textvariable=self.filter_vars["status"], values=STATUS_FILTERS,
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+
+        for label, key in (("From (YYYY-MM-DD)", "date_from"), ("To", "date_to"), ("Slot No", "slot_number")):
+            tk.Label(filter_frame, text=label, font=("Arial", 11, "bold"), bg="#EAF2F8").pack(side=tk.LEFT, padx=5)
+            tk.Entry(filter_frame, textvariable=self.filter_vars[key], font=("Arial", 11),
+                     width=12, bd=2, relief="solid").pack(side=tk.LEFT, padx=5)
+
+        tk.Button(filter_frame, text="Apply", font=("Arial", 11, "bold"), bg="#3498DB", fg="white",
+                  command=self.load_parking_entries).pack(side=tk.LEFT, padx=5)
+        tk.Button(filter_frame, text="Reset", font=("Arial", 11, "bold"), bg="#7F8C8D", fg="white",
+                  command=self.reset_filters).pack(side=tk.LEFT, padx=5)
+        self.board_status = tk.Label(filter_frame, font=("Arial", 10), bg="#EAF2F8", fg="#7F8C8D")
+        self.board_status.pack(side=tk.LEFT, padx=5)
+
+    def reset_filters(self):
+        self.filter_vars["status"].set("Parked")
+        for key in ("date_from", "date_to", "slot_number"):
+            self.filter_vars[key].set("")
+        self.load_parking_entries()
+
+    def current_filters(self):
+        slot_number = self.filter_vars["slot_number"].get().strip()
+        return {
+            "date_from": self.filter_vars["date_from"].get().strip() or None,
+            "date_to": self.filter_vars["date_to"].get().strip() or None,
+            "slot_id": self.slot_id,
+            "slot_number": int(slot_number) if slot_number.isdigit() else None,
+        }
 
     def show_add_parking_form(self):
         form_window = tk.Toplevel(self.root)
@@ -71,6 +225,12 @@ class ParkingPage:
             entry.grid(row=i, column=1, padx=10, pady=8, ipadx=5, sticky="ew")
             self.entries[label] = entry
 
+        # Type-ahead of parked plates beside the Vehicle Number field
+        self.plate_suggestions = tk.Label(form_frame, font=("Arial", 10), bg="#EAF2F8", fg="#C0392B",
+                                          justify="left", anchor="w", wraplength=220)
+        self.plate_suggestions.grid(row=labels.index("Vehicle Number"), column=2, padx=10, sticky="w")
+        self.entries["Vehicle Number"].bind("<KeyRelease>", self.suggest_plates)
+
         if self.slot_id and self.slot_number:
             self.entries["Slot Number"].insert(0, str(self.slot_number))
             self.entries["Slot Number"].config(state="disabled")
@@ -79,6 +239,10 @@ class ParkingPage:
                   bg="#3498DB", fg="white", activebackground="#2980B9", padx=15, pady=10,
                   bd=0, command=lambda: self.add_parking(form_window)).grid(row=len(labels), columnspan=2, pady=10)
 
+    def suggest_plates(self, event=None):
+        matches = get_plate_index().suggestions(self.entries["Vehicle Number"].get())
+        self.plate_suggestions.config(text="Already parked: " + ", ".join(matches) if matches else "")
+
     def validate_inputs(self):
         cust_name = self.entries["Customer Name"].get().strip()
         veh_no = self.entries["Vehicle Number"].get().strip()
@@ -86,27 +250,17 @@ class ParkingPage:
         aadhar_no = self.entries["Aadhar Number"].get().strip()
         duration = self.entries["Parking Duration (in hours)"].get().strip()
 
-        if not cust_name.replace(" ", "").isalpha():
-            messagebox.showerror("Error", "Customer Name should contain only alphabets!")
-            return False
-
-        vehicle_pattern = r"^[A-Z]{2}-\d{2}-[A-Z]{1,2}-\d{4}$"
-        if not re.match(vehicle_pattern, veh_no):
-            messagebox.showerror("Error", "Vehicle Number format: CC-NN-C-NNNN or CC-NN-CC-NNNN")
-            return False
-
-        if not contact_no.isdigit() or len(contact_no) != 10:
-            messagebox.showerror("Error", "Contact Number should be exactly 10 digits!")
-            return False
-
-        if not aadhar_no.isdigit() or len(aadhar_no) != 12:
-            messagebox.showerror("Error", "Aadhar Number must be exactly 12 digits!")
-            return False
-
-        if not duration.isdigit() or not (1 <= int(duration) <= 999):
-            messagebox.showerror("Error", "Parking Hours should be a 3-digit number (max 999)!")
+        error = validate_parking(cust_name, veh_no, contact_no, aadhar_no, duration)
+        if error is None and get_plate_index().is_active(veh_no):
+            error = f"Vehicle {veh_no} is already parked!"
+        # Every parking belongs to a slot category and bay (tbl_parking requires both)
+        if error is None and not self.slot_id:
+            error = "Pick a free bay on the Parking layout to add a vehicle!"
+        if error is None and not self.entries["Slot Number"].get().strip().isdigit():
+            error = "Slot Number must be a number!"
+        if error:
+            messagebox.showerror("Error", error)
             return False
-
         return True
 
     def add_parking(self, form_window):
@@ -119,63 +273,118 @@ class ParkingPage:
         aadhar_no = self.entries["Aadhar Number"].get().strip()
         slot_number = self.entries["Slot Number"].get().strip()
         duration = int(self.entries["Parking Duration (in hours)"].get().strip())
-
-        conn = connect_to_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            INSERT INTO tbl_parking 
-            (custname, veh_no, contact_no, aadhar_no, entry_time, date, status, slot_id, slot_number, exit_time) 
-            VALUES (%s, %s, %s, %s, NOW(), NOW(), %s, %s, %s, DATE_ADD(NOW(), INTERVAL %s HOUR))
-        """, (cust_name, veh_no, contact_no, aadhar_no, "Parked", self.slot_id, slot_number, duration))
-        conn.commit()
-
-        cursor.execute("SELECT LAST_INSERT_ID()")
-        park_id = cursor.fetchone()[0]
-
-        fare = duration * 10
         ticket_number = self.generate_ticket_number()
-        cursor.execute("INSERT INTO tbl_payment (park_id, amount, ticket_number) VALUES (%s, %s, %s)",
-                       (park_id, fare, ticket_number))
-        conn.commit()
-        conn.close()
+
+        park_id, ticket_number, amount, entry_time, exit_time, hours = check_in(
+            cust_name, veh_no, contact_no, aadhar_no, self.slot_id, slot_number, duration, ticket_number)
 
         messagebox.showinfo("Success", "Parking entry added successfully!")
         form_window.destroy()
-        self.go_to_payment(park_id, cust_name, veh_no, contact_no)
+        self.go_to_payment(park_id, cust_name, veh_no, contact_no,
+                           details=(entry_time, exit_time, hours, amount, ticket_number))
+
+    def import_csv(self):
+        """Checks in every vehicle listed in a CSV file on a worker thread."""
+        path = filedialog.askopenfilename(title="Import Vehicles",
+                                          filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        self.import_button.config(state="disabled", text="⏳ Importing...")
+        get_executor(self.root).submit(import_csv_file, self.on_import_done, self.on_import_failed,
+                                       group=self, args=(path, self.slot_id))
+
+    def on_import_done(self, result):
+        checked_in, errors, report_path = result
+        self.import_button.config(state="normal", text="📥 Import CSV")
+        self.refresh_parking_entries()
+        summary = f"Checked in {len(checked_in)} vehicle(s)."
+        if errors:
+            summary += f"\n{len(errors)} row(s) were rejected; see {report_path}"
+            messagebox.showwarning("Import Finished", summary)
+        else:
+            messagebox.showinfo("Import Finished", summary)
+
+    def on_import_failed(self, err):
+        self.import_button.config(state="normal", text="📥 Import CSV")
+        messagebox.showerror("Import Failed", str(err))
 
     def generate_ticket_number(self):
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        current_year = datetime.datetime.now().year % 100
-        prefix = f"PK-{current_year}-"
-        cursor.execute("SELECT ticket_number FROM tbl_payment WHERE ticket_number LIKE %s ORDER BY ticket_number DESC LIMIT 1", (prefix + "%",))
-        last_ticket = cursor.fetchone()
-        new_number = "0001" if not last_ticket else f"{int(last_ticket[0].split('-')[-1]) + 1:04d}"
-        conn.close()
-        return prefix + new_number
-
-    def go_to_payment(self, park_id, cust_name, veh_no, contact_no):
-        self.root.destroy()
-        root = tk.Tk()
-        PaymentPage(root, park_id, cust_name, veh_no, contact_no)
-        root.mainloop()
+        return next_ticket_number()
+
+    def go_to_payment(self, park_id, cust_name, veh_no, contact_no, details=None):
+        self.router.show("payment", parking_id=park_id, cust_name=cust_name,
+                         veh_no=veh_no, contact_no=contact_no, details=details)
+
+    def fetch_board(self, fetch, on_rows):
+        """Runs a board query on a worker thread; results for superseded filters are dropped."""
+        self.board_busy = True
+        generation = self.board_generation
+
+        def deliver(result):
+            if generation == self.board_generation:
+                self.board_busy = False
+                self.board_status.config(text="", fg="#7F8C8D")
+                on_rows(result)
+
+        self.executor.submit(fetch, deliver, on_error=lambda err: self.show_board_error(generation, err),
+                             group=self)
+
+    def show_board_error(self, generation, err):
+        if generation == self.board_generation:
+            self.board_busy = False
+            self.board_status.config(text=f"Error: {err}", fg="red")
 
     def load_parking_entries(self):
-        for row in self.parking_table.get_children():
-            self.parking_table.delete(row)
+        """Reloads the board for the current filters (active parkings by default)."""
+        self.status_filter = status = self.filter_vars["status"].get()
+        self.board_filters = filters = self.current_filters()
+        self.board_generation += 1
+        self.board_loaded = False
+        self.board_status.config(text="Loading…", fg="#7F8C8D")
+        self.fetch_board(lambda: fetch_parking_entries(status, **filters), self.show_entries)
+
+    def show_entries(self, result):
+        entries, self.high_water_mark = result
+        self.board_loaded = True
+        self.parking_table.delete(*self.parking_table.get_children())
+        for entry in entries:
+            self.parking_table.insert("", tk.END, iid=str(entry[0]), values=entry[1:9])
+        self.restripe()
+
+    def refresh_parking_entries(self):
+        """Fetches the rows changed since the high-water mark, unless a board query is still running."""
+        if self.board_busy:
+            return
+        if not self.board_loaded:
+            self.load_parking_entries()  # The last load failed; retry it rather than patch
+            return
+        mark, filters = self.high_water_mark, self.board_filters
+        self.fetch_board(lambda: fetch_parking_changes(mark, **filters), self.apply_changes)
 
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT custname, veh_no, contact_no, aadhar_no, entry_time, exit_time, status, slot_number FROM tbl_parking")
-        entries = cursor.fetchall()
-        conn.close()
+    def apply_changes(self, changes):
+        """Patches the board in place with the changed rows."""
+        if not changes:
+            return
 
-        for i, entry in enumerate(entries):
-            row_tag = "evenrow" if i % 2 == 0 else "oddrow"
-            self.parking_table.insert("", tk.END, values=entry, tags=(row_tag,))
+        for entry in changes:
+            iid = str(entry[0])
+            visible = self.status_filter == "All" or entry[7] == self.status_filter
+            if visible and self.parking_table.exists(iid):
+                self.parking_table.item(iid, values=entry[1:9])
+            elif visible:
+                self.parking_table.insert("", tk.END, iid=iid, values=entry[1:9])
+            elif self.parking_table.exists(iid):
+                self.parking_table.delete(iid)
+        self.high_water_mark = (changes[-1][9], changes[-1][0])
+        self.restripe()
+
+    def restripe(self):
+        for i, item in enumerate(self.parking_table.get_children()):
+            self.parking_table.item(item, tags=("evenrow" if i % 2 == 0 else "oddrow",))
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    ParkingPage(root)
+    from index import create_app, when_migrated
+    root = create_app(start="admin")
+    # The admin panel is only built once migrations have run
+    when_migrated(root, lambda: root.router.page("admin").show_parking())
     root.mainloop()
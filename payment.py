@@ -1,51 +1,63 @@
 import tkinter as tk
 from tkinter import messagebox
-from db_connection import connect_to_db  
+from db_connection import db_connection
+from rollup import bump_data_version, record_paid
+
+PAYMENT_DETAILS_QUERY = """
+    SELECT p.entry_time, p.exit_time, IFNULL(p.hours_parked, TIMESTAMPDIFF(HOUR, p.entry_time, NOW())),
+        pay.amount, pay.ticket_number
+    FROM tbl_parking p
+    JOIN tbl_payment pay ON p.park_id = pay.park_id
+    WHERE p.park_id = %s
+"""
+MARK_PAID_QUERY = "UPDATE tbl_payment SET status = %s WHERE park_id = %s"
 
 class PaymentPage:
-    def __init__(self, root, parking_id, cust_name, veh_no, contact_no):
+    def __init__(self, root, router, parking_id, cust_name, veh_no, contact_no, details=None):
         self.root = root
+        self.router = router
+        self.root.configure(bg="#010f26")
+
+        self.build_page()
+        self.on_show(parking_id, cust_name, veh_no, contact_no, details)
+
+    def on_show(self, parking_id, cust_name, veh_no, contact_no, details=None):
+        """Fills the kept page in for the parking that was just checked in.
+
+        details is the (entry_time, exit_time, hours, amount, ticket_number)
+        returned by the check-in; the database is only asked when it is missing.
+        """
         self.parking_id = parking_id
         self.cust_name = cust_name
         self.veh_no = veh_no
         self.contact_no = contact_no
 
-        self.entry_time, self.exit_time, self.duration, self.amount, self.ticket_number = self.get_parking_details()
-  
-        self.root.title("Payment Page")
-        self.root.geometry("400x450")
-        self.root.configure(bg="#010f26")
+        self.entry_time, self.exit_time, self.duration, self.amount, self.ticket_number = (
+            details or self.get_parking_details())
 
-        self.build_page()
+        fields = [
+            self.ticket_number,
+            self.cust_name,
+            self.veh_no,
+            self.contact_no,
+            self.entry_time,
+            self.exit_time,
+            self.duration,
+            f"${self.amount}"
+        ]
+        for value_label, value in zip(self.value_labels, fields):
+            value_label.config(text=value)
 
     def get_parking_details(self):
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT p.entry_time, p.exit_time, TIMESTAMPDIFF(HOUR, p.entry_time, IFNULL(p.exit_time, NOW())), 
-                s.fare, pay.ticket_number
-            FROM tbl_parking p
-            JOIN tbl_slots s ON p.slot_id = s.slot_id
-            JOIN tbl_payment pay ON p.park_id = pay.park_id  -- ✅ Corrected join
-            WHERE p.park_id = %s
-        """, (self.parking_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(PAYMENT_DETAILS_QUERY, (self.parking_id,))
+            result = cursor.fetchone()
         if result:
-            entry_time, exit_time, duration, fare, ticket_number = result  # ✅ FIXED
-            duration = max(duration, 1)
-            amount = duration * fare
-            self.update_payment_table(amount)
-            return entry_time, exit_time, duration, amount, ticket_number
+            # The amount was priced when the vehicle checked in
+            return result
         else:
-            return "N/A", "N/A", "N/A", "N/A"
-
-    def update_payment_table(self, amount):
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE tbl_payment SET amount = %s WHERE park_id = %s", (amount, self.parking_id))
-        conn.commit()
-        conn.close()
+            return "N/A", "N/A", "N/A", "N/A", "N/A"
 
     def build_page(self):
         tk.Label(self.root, text="Payment for Parking", font=("Arial", 18, "bold"), fg="white").pack(pady=10)
@@ -53,20 +65,15 @@ class PaymentPage:
         details_frame = tk.Frame(self.root, bd=2, relief="solid", padx=10, pady=10, bg="white")
         details_frame.pack(pady=10, padx=20, fill="both")
 
-        fields = [
-            ("Ticket Number:", self.ticket_number),
-            ("Customer Name:", self.cust_name),
-            ("Vehicle Number:", self.veh_no),
-            ("Contact Number:", self.contact_no),
-            ("Entry Time:", self.entry_time),
-            ("Exit Time:", self.exit_time),
-            ("Hours Parked:", self.duration),
-            ("Total Amount:", f"${self.amount}")
-        ]
+        labels = ["Ticket Number:", "Customer Name:", "Vehicle Number:", "Contact Number:",
+                  "Entry Time:", "Exit Time:", "Hours Parked:", "Total Amount:"]
+        self.value_labels = []
 
-        for i, (label, value) in enumerate(fields):
+        for i, label in enumerate(labels):
             tk.Label(details_frame, text=label, font=("Arial", 10, "bold"), bg="white").grid(row=i, column=0, sticky="w", padx=5, pady=2)
-            tk.Label(details_frame, text=value, font=("Arial", 10), bg="white").grid(row=i, column=1, sticky="w", padx=5, pady=2)
+            value_label = tk.Label(details_frame, font=("Arial", 10), bg="white")
+            value_label.grid(row=i, column=1, sticky="w", padx=5, pady=2)
+            self.value_labels.append(value_label)
 
         btn_frame = tk.Frame(self.root, bg="#010f26")
         btn_frame.pack(pady=10)
@@ -86,34 +93,26 @@ class PaymentPage:
             self.complete_payment()
 
     def complete_payment(self):
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE tbl_parking SET status = %s WHERE park_id = %s", ('Parked', self.parking_id))
-        cursor.execute("UPDATE tbl_payment SET status = %s WHERE park_id = %s", ('Paid', self.parking_id))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE tbl_parking SET status = %s WHERE park_id = %s", ('Parked', self.parking_id))
+            record_paid(cursor, self.parking_id)
+            cursor.execute(MARK_PAID_QUERY, ('Paid', self.parking_id))
+            conn.commit()
+        bump_data_version()
 
         messagebox.showinfo("Success", "Payment completed!")
         self.go_back_to_parking()
 
     def go_back_to_parking(self):
-        self.root.destroy()  # Close the current payment window
-
-        # Check if there is an existing Tk root window and close it
-        if tk._default_root:
-            tk._default_root.quit()  # Quit the mainloop safely
-            tk._default_root.destroy()  # Destroy any remaining windows
-
-        # Reopen the Admin Panel with Payment View
-        import Main
-        app = Main.AdminPanel()
-        app.show_payment_view()
-        app.mainloop()
-
-
+        # Return to the kept Payment View and pick up the new payment
+        self.router.show("payment_view", refresh=True)
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    PaymentPage(root, 1, "John Doe", "ABC123", "1234567890")
-    root.mainloop()
\ No newline at end of file
+    from index import create_app, when_migrated
+    root = create_app(start="admin")
+    # The admin panel is only built once migrations have run
+    when_migrated(root, lambda: root.router.page("admin").pages.show(
+        "payment", parking_id=1, cust_name="John Doe", veh_no="ABC123", contact_no="1234567890"))
+    root.mainloop()
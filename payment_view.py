@@ -1,14 +1,104 @@
 # payment_view.py
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
-from db_connection import connect_to_db
-import tempfile
+from background import get_executor
+from column_store import ColumnStore
+from db_connection import db_connection
+from tickets import render_escpos, render_html, send_to_printer, spool_html, ticket_from_row
 import webbrowser
 import os
 import platform
+from bisect import bisect_left
+
+PAGE_SIZE = 100
+MAX_WINDOW_ROWS = 3 * PAGE_SIZE
+# Rows the page keeps loaded for sorting and filtering. Past this, paging
+# evicts rows from the far end of the store (never ones in the tree), and
+# scrolling back re-fetches them by key.
+MAX_STORE_ROWS = 50 * PAGE_SIZE
+FILTER_DEBOUNCE_MS = 250
+# Ticket, customer, vehicle and payment status
+SEARCH_COLUMNS = (0, 1, 2, 11)
+
+PAYMENT_QUERY = """
+    SELECT 
+      p.ticket_number, 
+      pr.custname, 
+      pr.veh_no, 
+      pr.contact_no, 
+      pr.aadhar_no,
+      pr.date, 
+      pr.entry_time, 
+      pr.exit_time, 
+      s.slotname, 
+      pr.hours_parked, 
+      p.amount, 
+      p.status,
+      pr.park_id
+    FROM 
+      tbl_payment p
+    JOIN 
+      tbl_parking pr ON p.park_id = pr.park_id
+    LEFT JOIN 
+      tbl_slots s ON pr.slot_id = s.slot_id
+"""
+
+
+def payment_page_query(after=None, before=None, limit=PAGE_SIZE):
+    """Returns (sql, params) for one page of the payment join, keyed on (date, park_id).
+
+    ``after`` continues towards older rows from the given key and ``before``
+    towards newer ones (in ascending order, nearest first); both are served
+    from the index on tbl_parking(date) without counting or skipping rows.
+    """
+    where, params, order = "", (), "DESC"
+    if after is not None:
+        where = "WHERE pr.date < %s OR (pr.date = %s AND pr.park_id < %s)"
+        params = (after[0], after[0], after[1])
+    elif before is not None:
+        where = "WHERE pr.date > %s OR (pr.date = %s AND pr.park_id > %s)"
+        params, order = (before[0], before[0], before[1]), "ASC"
+    return (f"{PAYMENT_QUERY} {where} ORDER BY pr.date {order}, pr.park_id {order} LIMIT %s",
+            params + (limit,))
+
+
+def fetch_payment_page(after=None, before=None, limit=PAGE_SIZE):
+    """Returns one page of payments, newest first."""
+    query, params = payment_page_query(after, before, limit)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    if before is not None:
+        rows.reverse()
+    return rows
+
+
+def ticket_search_query(prefix, limit=PAGE_SIZE):
+    """Returns (sql, params) for the payments whose ticket number starts with prefix.
+
+    A prefix match is a range read on idx_payment_ticket_number, so it
+    reaches payments the page has not loaded without scanning the history.
+    """
+    pattern = prefix.upper().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return f"{PAYMENT_QUERY} WHERE p.ticket_number LIKE %s ORDER BY p.ticket_number LIMIT %s", (pattern, limit)
+
+
+def search_tickets(prefix, limit=PAGE_SIZE):
+    query, params = ticket_search_query(prefix, limit)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
 
 class PaymentViewPage:
     def __init__(self, parent):
+        self.executor = get_executor(parent)
+        self.generation = 0
         self.frame = tk.Frame(parent, bg="#f0f0f0")
         self.frame.pack(fill=tk.BOTH, expand=True)
 
@@ -19,6 +109,19 @@ class PaymentViewPage:
         tk.Label(header, text="💰 Payment View Details", font=("Arial", 18, "bold"), 
                  fg="white", bg="#010f26", pady=15).pack()
 
+        # Filter bar
+        filter_frame = tk.Frame(self.frame, bg="#f0f0f0", padx=20)
+        filter_frame.pack(fill=tk.X, pady=(10, 0))
+        tk.Label(filter_frame, text="🔍 Filter (ticket, vehicle, customer, status):", font=("Arial", 11, "bold"),
+                 bg="#f0f0f0").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", self.on_filter_typed)
+        tk.Entry(filter_frame, textvariable=self.filter_var, font=("Arial", 11), width=30,
+                 bd=2, relief="solid").pack(side=tk.LEFT, padx=10)
+        self.filter_job = None
+        self.search_label = tk.Label(filter_frame, font=("Arial", 10), bg="#f0f0f0", fg="#7F8C8D")
+        self.search_label.pack(side=tk.RIGHT)
+
         # Table Frame
         table_frame = tk.Frame(self.frame, bg="white", padx=20, pady=10)
         table_frame.pack(pady=10, fill=tk.BOTH, expand=True)
@@ -32,7 +135,8 @@ class PaymentViewPage:
         # Add Aadhar Number in columns
         self.tree = ttk.Treeview(table_frame, columns=("Ticket Number", "Customer Name", "Vehicle Number", "Contact No", 
                                                        "Aadhar Number", "Parking Date", "Entry Time", "Exit Time", 
-                                                       "Slot Name", "Hours Parked", "Amount", "Payment Status"), show="headings")
+                                                       "Slot Name", "Hours Parked", "Amount", "Payment Status"), show="headings",
+                                 selectmode="extended")  # Ctrl/Shift-click to batch print
 
         headers = ["Ticket Number", "Customer Name", "Vehicle Number", "Contact No", 
                    "Aadhar Number", "Parking Date", "Entry Time", "Exit Time", 
@@ -40,14 +144,17 @@ class PaymentViewPage:
 
         col_widths = [120, 120, 100, 120, 140, 110, 100, 100, 100, 100, 100, 120]
 
-        for col, width in zip(headers, col_widths):
-            self.tree.heading(col, text=col)
+        self.headers = headers
+        self.sort_column = None
+        self.sort_descending = False
+        for index, (col, width) in enumerate(zip(headers, col_widths)):
+            self.tree.heading(col, text=col, command=lambda index=index: self.sort_by(index))
             self.tree.column(col, width=width, anchor='center')
 
         # Add scrollbar
-        scroll_y = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        scroll_y.pack(side="right", fill="y")
-        self.tree.configure(yscrollcommand=scroll_y.set)
+        self.scroll_y = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.scroll_y.pack(side="right", fill="y")
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
 
         self.tree.pack(fill=tk.BOTH, expand=True)
 
@@ -63,75 +170,253 @@ class PaymentViewPage:
         
         self.print_btn = tk.Button(btn_frame, text="🖨 Display Ticket", font=("Arial", 12, "bold"), bg="#27AE60", fg="white", 
                                    padx=10, pady=5, command=self.display_ticket)
-        self.print_btn.pack()
+        self.print_btn.pack(side=tk.LEFT, padx=5)
+
+        tk.Button(btn_frame, text="🧾 Send to Ticket Printer", font=("Arial", 12, "bold"), bg="#2980B9", fg="white",
+                  padx=10, pady=5, command=self.send_selected_to_printer).pack(side=tk.LEFT, padx=5)
+
+    def on_show(self, refresh=False):
+        if refresh:
+            self.load_payment_data()
 
     def load_payment_data(self):
-        try:
-            conn = connect_to_db()
-            cursor = conn.cursor()
-
-            query = """
-                SELECT 
-                  p.ticket_number, 
-                  pr.custname, 
-                  pr.veh_no, 
-                  pr.contact_no, 
-                  pr.aadhar_no,
-                  pr.date, 
-                  pr.entry_time, 
-                  pr.exit_time, 
-                  s.slotname, 
-                  TIMESTAMPDIFF(HOUR, pr.entry_time, pr.exit_time) AS hours_parked, 
-                  p.amount, 
-                  p.status
-                FROM 
-                  tbl_payment p
-                JOIN 
-                  tbl_parking pr ON p.park_id = pr.park_id
-                LEFT JOIN 
-                  tbl_slots s ON pr.slot_id = s.slot_id;
-            """
-            cursor.execute(query)
-            rows = cursor.fetchall()
-
-            for index, row in enumerate(rows):
-                tag = 'evenrow' if index % 2 == 0 else 'oddrow'
-                row = list(row)
-                row[10] = f"₹{row[10]}"  # Add Rupee Symbol
-                self.tree.insert("", tk.END, values=row, tags=(tag,))
-            
-            cursor.close()
-            conn.close()
-        except Exception as err:
-            tk.Label(self.frame, text=f"Error: {err}", fg="red", bg="#f0f0f0").pack()
+        """Resets the table to the newest page of payments, keeping the sort and filter."""
+        self.tree.delete(*self.tree.get_children())
+        self.store = ColumnStore(13, SEARCH_COLUMNS)
+        self.search_label.config(text="")
+        self.view = []
+        self.view_needle = ""
+        self.window_start = self.window_end = 0
+        self.first_key = self.last_key = None
+        self.has_newer = self.reached_end = False
+        self.searching = False  # The tree shows server-side ticket matches, not the view
+        self.loading = False
+        self.generation += 1  # Results of fetches still in flight are ignored
+        self.load_next_page()
+
+    def on_tree_scroll(self, first, last):
+        """Keeps the scrollbar in sync and slides the window as the view nears an edge."""
+        self.scroll_y.set(first, last)
+        if self.loading or self.searching:
+            return
+        # Pages arrive in key order, so they only extend the unsorted view
+        if float(last) >= 0.9:
+            if self.window_end < len(self.view):
+                self.slide_forward()
+            elif self.sort_column is None and not self.reached_end:
+                self.load_next_page()
+        elif float(first) <= 0.1:
+            if self.window_start > 0:
+                self.slide_back()
+            elif self.sort_column is None and self.has_newer:
+                self.load_previous_page()
+
+    def fetch_async(self, on_rows, fetch=fetch_payment_page, **kwargs):
+        """Runs a fetch on a worker thread and passes the rows to on_rows."""
+        self.loading = True
+        generation = self.generation
+
+        def deliver(rows):
+            if generation == self.generation:
+                on_rows(rows)
+
+        self.executor.submit(lambda: fetch(**kwargs), deliver, on_error=self.show_load_error, group=self)
+
+    def show_load_error(self, err):
+        self.loading = False
+        tk.Label(self.frame, text=f"Error: {err}", fg="red", bg="#f0f0f0").pack()
+
+    def load_next_page(self):
+        self.fetch_async(self.append_rows, after=self.last_key)
+
+    def load_previous_page(self):
+        self.fetch_async(self.prepend_rows, before=self.first_key)
+
+    def append_rows(self, rows):
+        if len(rows) < PAGE_SIZE:
+            self.reached_end = True
+        if rows:
+            if self.first_key is None:
+                self.first_key = (rows[0][5], rows[0][12])
+            self.last_key = (rows[-1][5], rows[-1][12])
+            self.store.extend(rows)
+            if self.sort_column is None:
+                self.evict_front()
+                self.view = self.compute_view()
+                self.slide_forward()
+            else:
+                self.refresh_view()
+        self.loading = False
+        self.search_if_missing()
+
+    def prepend_rows(self, rows):
+        if len(rows) < PAGE_SIZE:
+            self.has_newer = False
+        if rows:
+            self.first_key = (rows[0][5], rows[0][12])
+            self.evict_back(len(rows))
+            self.store.extend_front(rows)
+            self.view = self.compute_view()
+            shift = bisect_left(self.view, len(rows))  # Matching rows added ahead of the window
+            self.window_start += shift
+            self.window_end += shift
+            self.slide_back()
+        self.loading = False
+
+    def evict_front(self):
+        """Drops the newest rows over MAX_STORE_ROWS, stopping at the first one in the tree."""
+        count = len(self.store) - MAX_STORE_ROWS
+        if self.window_end > self.window_start:
+            count = min(count, self.view[self.window_start])
+        if count <= 0:
+            return
+        shift = bisect_left(self.view, count)
+        self.window_start -= shift
+        self.window_end -= shift
+        self.store.drop_front(count)
+        self.first_key = (self.store.columns[5][0], self.store.columns[12][0])
+        self.has_newer = True
+
+    def evict_back(self, incoming):
+        """Makes room for incoming rows by dropping the oldest, stopping at the last one in the tree."""
+        count = len(self.store) + incoming - MAX_STORE_ROWS
+        if self.window_end > self.window_start:
+            count = min(count, len(self.store) - 1 - self.view[self.window_end - 1])
+        if count <= 0:
+            return
+        self.store.drop_back(count)
+        self.last_key = (self.store.columns[5][-1], self.store.columns[12][-1])
+        self.reached_end = False
+
+    def compute_view(self):
+        """Returns the store's row indices in the current sort order, filtered."""
+        self.view_needle = self.filter_var.get().strip().lower()
+        if self.sort_column is None:
+            indices = range(len(self.store))
+        else:
+            indices = self.store.order(self.sort_column, self.sort_descending)
+        return self.store.matching(self.view_needle, indices) if self.view_needle else list(indices)
+
+    def refresh_view(self):
+        self.view = self.compute_view()
+        self.render_window(0)
+        self.tree.yview_moveto(0)
+        self.search_if_missing()
+
+    def search_if_missing(self):
+        """Looks the filter up as a ticket prefix server-side when no loaded row matches it."""
+        needle = self.view_needle
+        if not needle or self.view or self.loading or not (self.has_newer or not self.reached_end):
+            return
+
+        def show_matches(rows):
+            self.loading = False
+            if needle != self.view_needle or self.view:
+                return
+            for position, row in enumerate(rows):
+                self.insert_row(tk.END, position, row)
+            self.searching = bool(rows)
+            self.search_label.config(text=f"{len(rows)} ticket(s) from the full history" if rows else "")
+
+        self.fetch_async(show_matches, fetch=search_tickets, prefix=needle)
+
+    def sort_by(self, column):
+        """Cycles a column through ascending, descending and the loaded (newest first) order."""
+        if self.sort_column != column:
+            self.sort_column, self.sort_descending = column, False
+        elif not self.sort_descending:
+            self.sort_descending = True
+        else:
+            self.sort_column = None
+        for index, header in enumerate(self.headers):
+            arrow = ""
+            if index == self.sort_column:
+                arrow = " ▼" if self.sort_descending else " ▲"
+            self.tree.heading(header, text=header + arrow)
+        self.refresh_view()
+
+    def on_filter_typed(self, *args):
+        if self.filter_job is not None:
+            self.frame.after_cancel(self.filter_job)
+        self.filter_job = self.frame.after(FILTER_DEBOUNCE_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_job = None
+        needle = self.filter_var.get().strip().lower()
+        if needle == self.view_needle:
+            return
+        if self.view_needle and needle.startswith(self.view_needle):
+            # Typing more only narrows the rows already matching
+            self.view = self.store.matching(needle, self.view)
+            self.view_needle = needle
+            self.render_window(0)
+            self.tree.yview_moveto(0)
+            self.search_if_missing()
+        else:
+            self.refresh_view()
+
+    def render_window(self, start):
+        """Re-inserts only the window of the view starting at start into the tree."""
+        selected = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        self.searching = False
+        self.search_label.config(text="")
+        self.window_start = self.window_end = max(0, min(start, len(self.view) - MAX_WINDOW_ROWS))
+        self.extend_window(min(len(self.view), self.window_start + MAX_WINDOW_ROWS))
+        kept = [item for item in selected if self.tree.exists(item)]
+        if kept:
+            self.tree.selection_set(kept)
+
+    def extend_window(self, end):
+        for position in range(self.window_end, end):
+            self.insert_row(tk.END, position, self.store.row(self.view[position]))
+        self.window_end = end
+
+    def slide_forward(self):
+        items = self.tree.get_children()
+        anchor = items[-1] if items else None
+        self.extend_window(min(len(self.view), self.window_end + PAGE_SIZE))
+        excess = self.window_end - self.window_start - MAX_WINDOW_ROWS
+        if excess > 0:
+            self.tree.delete(*self.tree.get_children()[:excess])
+            self.window_start += excess
+        if anchor:
+            self.tree.see(anchor)
+
+    def slide_back(self):
+        items = self.tree.get_children()
+        start = max(0, self.window_start - PAGE_SIZE)
+        for position in range(self.window_start - 1, start - 1, -1):
+            self.insert_row(0, position, self.store.row(self.view[position]))
+        self.window_start = start
+        excess = self.window_end - self.window_start - MAX_WINDOW_ROWS
+        if excess > 0:
+            self.tree.delete(*self.tree.get_children()[-excess:])
+            self.window_end -= excess
+        if items:
+            self.tree.see(items[0])
+
+    def insert_row(self, position, index, row):
+        tag = 'evenrow' if index % 2 == 0 else 'oddrow'
+        values = list(row[:12])
+        values[10] = f"₹{values[10]}"  # Add Rupee Symbol
+        self.tree.insert("", position, iid=str(row[12]), values=values, tags=(tag,))
+
+    def selected_tickets(self):
+        return [ticket_from_row(self.tree.item(item)["values"]) for item in self.tree.selection()]
 
     def display_ticket(self):
-        selected_item = self.tree.selection()
-        if not selected_item:
+        tickets = self.selected_tickets()
+        if not tickets:
             messagebox.showwarning("Warning", "Please select a payment record to display.")
             return
-        
-        item = self.tree.item(selected_item)
-        values = item['values']
-        
-        details = [
-            f"Ticket Number: {values[0]}",
-            f"Customer Name: {values[1]}",
-            f"Vehicle Number: {values[2]}",
-            f"Contact No: {values[3]}",
-            f"Aadhar Number: {values[4]}",
-            f"Parking Date: {values[5]}",
-            f"Entry Time: {values[6]}",
-            f"Exit Time: {values[7]}",
-            f"Slot Name: {values[8]}",
-            f"Hours Parked: {values[9]}",
-            f"Amount Paid: {values[10]}",  # Already formatted with ₹
-            f"Payment Status: {values[11]}",
-        ]
-
-        self.show_ticket_popup(details)
-
-    def show_ticket_popup(self, details):
+        if len(tickets) > 1:
+            self.print_tickets(tickets)
+            return
+
+        self.show_ticket_popup(tickets[0])
+
+    def show_ticket_popup(self, ticket):
         ticket_window = Toplevel()
         ticket_window.title("Parking Ticket")
         ticket_window.geometry("450x600")
@@ -142,13 +427,12 @@ class PaymentViewPage:
         ticket_frame = tk.Frame(ticket_window, bg="white", padx=15, pady=15, relief=tk.RIDGE, borderwidth=2)
         ticket_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
 
-        for detail in details:
-            key, value = detail.split(":", 1)
+        for key, value in ticket:
             row_frame = tk.Frame(ticket_frame, bg="white")
             row_frame.pack(fill=tk.X, pady=4)
             
-            tk.Label(row_frame, text=key.strip() + ":", font=("Arial", 12, "bold"), bg="white", anchor="w", width=16).pack(side=tk.LEFT)
-            tk.Label(row_frame, text=value.strip(), font=("Arial", 12), bg="white", anchor="w").pack(side=tk.LEFT, expand=True, padx=10)
+            tk.Label(row_frame, text=key + ":", font=("Arial", 12, "bold"), bg="white", anchor="w", width=16).pack(side=tk.LEFT)
+            tk.Label(row_frame, text=value, font=("Arial", 12), bg="white", anchor="w").pack(side=tk.LEFT, expand=True, padx=10)
 
         tk.Label(ticket_frame, text="Thank You for Choosing Us!", font=("Arial", 12, "bold"), fg="green", bg="white", pady=10).pack()
 
@@ -156,60 +440,29 @@ class PaymentViewPage:
         button_frame.pack()
 
         print_button = tk.Button(button_frame, text="🖨 Print", font=("Arial", 12, "bold"), bg="#27AE60", fg="white",
-                                padx=12, pady=6, command=lambda: self.print_ticket(details, ticket_window))
+                                padx=12, pady=6, command=lambda: self.print_ticket(ticket, ticket_window))
         print_button.pack(side=tk.LEFT, padx=10)
 
         close_button = tk.Button(button_frame, text="❌ Close", font=("Arial", 12, "bold"), bg="#E74C3C", fg="white",
                                 padx=12, pady=6, command=ticket_window.destroy)
         close_button.pack(side=tk.RIGHT, padx=10)
 
-    def print_ticket(self, details, ticket_window):
+    def print_ticket(self, ticket, ticket_window):
         ticket_window.destroy()
+        self.print_tickets([ticket])
 
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".html")
-
-        with open(temp_file.name, "w", encoding="utf-8") as file:
-            file.write("""
-            <html>
-            <head>
-                <title>Parking Ticket</title>
-                <style>
-                    body { font-family: Arial, sans-serif; text-align: center; }
-                    .container { width: 400px; margin: auto; border: 2px solid #000; padding: 20px; border-radius: 10px; }
-                    h1 { color: darkblue; }
-                    table { width: 100%; border-collapse: collapse; margin-top: 10px; }
-                    td { padding: 8px; border-bottom: 1px solid #ddd; text-align: left; }
-                    .footer { font-weight: bold; color: green; margin-top: 10px; }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <h1>🚗 Parking Ticket</h1>
-                    <hr>
-                    <table>
-            """)
-            for detail in details:
-                key, value = detail.split(":", 1)
-                file.write(f"<tr><td style='font-weight:bold;'>{key.strip()}:</td><td>{value.strip()}</td></tr>")
-
-            file.write("""
-                    </table>
-                    <hr>
-                    <p class="footer">Thank You for Choosing Us!</p>
-                </div>
-            <script>
-                window.onload = function() {
-                    window.print();
-                    setTimeout(function() {
-                        window.close();
-                    }, 500);
-                };
-            </script>
-            </body>
-            </html>
-            """)
-
+    def print_tickets(self, tickets):
+        """Opens all tickets as one paginated document in a single browser launch."""
+        path = spool_html(render_html(tickets))
         if platform.system() == "Windows":
-            os.startfile(temp_file.name)
+            os.startfile(path)
         else:
-            webbrowser.open_new("file://" + temp_file.name)
+            webbrowser.open_new("file://" + path)
+
+    def send_selected_to_printer(self):
+        tickets = self.selected_tickets()
+        if not tickets:
+            messagebox.showwarning("Warning", "Please select the payment records to print.")
+            return
+        path = send_to_printer(render_escpos(tickets))
+        messagebox.showinfo("Ticket Printer", f"Sent {len(tickets)} ticket(s) to {path}")
@@ -0,0 +1,112 @@
+"""Query plan regression check.
+
+``python plan_check.py [--database NAME]`` runs EXPLAIN on every query the
+pages issue, with parameters taken from the data, and exits non-zero when
+any of them full-scans one of the large tables. Run it against the seeded
+benchmark database (see benchmark.py) so the optimizer sees realistic
+table sizes.
+"""
+import argparse
+import sys
+
+from benchmark import BENCH_DATABASE, use_database
+from db_connection import db_connection
+from checkin import (ACTIVE_PARK_ID_QUERY, CHECK_OUT_QUERY, MAX_PARK_ID_QUERY, PARKED_BAY_QUERY,
+                     inserted_park_ids_query)
+from export import export_query
+from index import LOGIN_QUERY
+from occupancy import ACTIVE_BAYS_QUERY, SLOT_CATEGORIES_QUERY
+from parking import HIGH_WATER_MARK_QUERY, parking_changes_query, parking_entries_query
+from payment import MARK_PAID_QUERY, PAYMENT_DETAILS_QUERY
+from payment_view import payment_page_query, ticket_search_query
+from plates import ACTIVE_PLATES_QUERY
+from rollup import ROLLUP_TOKEN_QUERY
+from stats import STATISTICS_QUERY
+from sweeper import GRACE_MINUTES, OVERDUE_QUERY
+from tariff import OPEN_DURATIONS_QUERY, rate_queries, reprice_queries
+from ticket_allocator import LAST_TICKET_QUERY
+
+LARGE_TABLES = {"tbl_parking", "tbl_payment"}
+
+
+def sample_params():
+    """Picks an existing parking and its ticket to fill in the query parameters."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT pr.park_id, pr.date, pr.slot_id, pr.slot_number, pr.updated_at, pr.veh_no, pay.ticket_number
+            FROM tbl_parking pr JOIN tbl_payment pay ON pay.park_id = pr.park_id
+            ORDER BY pr.park_id DESC LIMIT 1
+        """)
+        park_id, date, slot_id, slot_number, updated_at, veh_no, ticket_number = cursor.fetchone()
+    return {"park_id": park_id, "date": date, "slot_id": slot_id, "slot_number": slot_number,
+            "updated_at": updated_at, "veh_no": veh_no, "ticket_number": ticket_number,
+            "year_prefix": ticket_number[:6] + "%"}
+
+
+def page_queries(p):
+    """Returns (name, sql, params) for each query issued by the pages, built by the pages' own code."""
+    board_filters = {"date_from": p["date"], "slot_id": p["slot_id"]}
+    mark = (p["updated_at"], p["park_id"])
+    categories_query, tiers_query = rate_queries(p["slot_id"])
+    reprice_rollup, reprice_update = reprice_queries(p["slot_id"], [(1, 10), (2, 20)])
+    return [
+        ("index.login", LOGIN_QUERY, ("admin", "admin")),
+        ("index.statistics", STATISTICS_QUERY, ()),
+        ("parking.active_board", *parking_entries_query("Parked")),
+        ("parking.history_board", *parking_entries_query("Exited", **board_filters)),
+        ("parking.high_water_mark", HIGH_WATER_MARK_QUERY, ()),
+        ("parking.changes", *parking_changes_query(mark)),
+        ("payment.details", PAYMENT_DETAILS_QUERY, (p["park_id"],)),
+        ("payment.mark_paid", MARK_PAID_QUERY, ("Paid", p["park_id"])),
+        ("payment_view.first_page", *payment_page_query()),
+        ("payment_view.next_page", *payment_page_query(after=(p["date"], p["park_id"]))),
+        ("payment_view.previous_page", *payment_page_query(before=(p["date"], p["park_id"]))),
+        ("payment_view.ticket_search", *ticket_search_query(p["ticket_number"][:6])),
+        ("slot_layout.occupancy", ACTIVE_BAYS_QUERY, ()),
+        ("slot_layout.categories", SLOT_CATEGORIES_QUERY, ()),
+        ("plates.active", ACTIVE_PLATES_QUERY, ()),
+        ("graphs.rollup_token", ROLLUP_TOKEN_QUERY, ()),
+        ("checkin.active_park_id", ACTIVE_PARK_ID_QUERY, (p["slot_id"], p["slot_number"])),
+        ("checkin.parked_bay", PARKED_BAY_QUERY, (p["park_id"],)),
+        ("checkin.check_out", CHECK_OUT_QUERY, (p["park_id"],)),
+        ("checkin.max_park_id", MAX_PARK_ID_QUERY, ()),
+        ("checkin.inserted_park_ids", *inserted_park_ids_query(p["park_id"] - 1, [p["veh_no"]])),
+        ("tariff.categories", *categories_query),
+        ("tariff.tiers", *tiers_query),
+        ("tariff.open_durations", OPEN_DURATIONS_QUERY, (p["slot_id"],)),
+        ("tariff.reprice_rollup", *reprice_rollup),
+        ("tariff.reprice_amounts", *reprice_update),
+        ("export.payments", *export_query(p["date"], p["date"], "Pending")),
+        ("sweeper.overdue", OVERDUE_QUERY, (GRACE_MINUTES,)),
+        ("ticket_allocator.seed", LAST_TICKET_QUERY, (p["year_prefix"],)),
+    ]
+
+
+def full_scans(cursor, sql, params):
+    """Returns the large tables the plan reads with a full table scan."""
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [column[0] for column in cursor.description]
+    plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    return [step["table"] for step in plan if step["type"] == "ALL" and step["table"] in LARGE_TABLES]
+
+
+def check():
+    failures = []
+    queries = page_queries(sample_params())
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        for name, sql, params in queries:
+            scanned = full_scans(cursor, sql, params)
+            print(f"{'FULL SCAN' if scanned else 'ok':9}  {name}" + (f"  ({', '.join(scanned)})" if scanned else ""))
+            if scanned:
+                failures.append(name)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when a page query full-scans a large table.")
+    parser.add_argument("--database", default=BENCH_DATABASE)
+    args = parser.parse_args()
+    use_database(args.database)
+    sys.exit(1 if check() else 0)
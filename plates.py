@@ -0,0 +1,122 @@
+import re
+import threading
+from bisect import bisect_left, insort
+
+from db_connection import db_connection
+
+PLATE_PATTERN = re.compile(r"^([A-Z])([A-Z])-(\d{2})-([A-Z])([A-Z]?)-(\d{4})$")
+SUGGESTION_LIMIT = 8
+ACTIVE_PLATES_QUERY = "SELECT park_id, veh_no FROM tbl_parking WHERE status = 'Parked'"
+
+
+def pack_plate(plate):
+    """Packs a CC-NN-C(C)-NNNN plate into an int, or returns None for other plates.
+
+    Keys sort in the same order as the plate strings (a one-letter series
+    before any two-letter one, as '-' sorts before letters).
+    """
+    match = PLATE_PATTERN.match(plate)
+    if match is None:
+        return None
+    state1, state2, district, series1, series2, number = match.groups()
+    key = (ord(state1) - 65) * 26 + ord(state2) - 65
+    key = key * 100 + int(district)
+    key = key * 27 * 26 + (ord(series1) - 65) * 27 + (ord(series2) - 64 if series2 else 0)
+    return key * 10000 + int(number)
+
+
+def unpack_plate(key):
+    key, number = divmod(key, 10000)
+    key, series = divmod(key, 27 * 26)
+    state, district = divmod(key, 100)
+    series1, series2 = divmod(series, 27)
+    state1, state2 = divmod(state, 26)
+    series_letters = chr(series1 + 65) + (chr(series2 + 64) if series2 else "")
+    return f"{chr(state1 + 65)}{chr(state2 + 65)}-{district:02d}-{series_letters}-{number:04d}"
+
+
+class PlateIndex:
+    """In-memory index of the plates of every parked vehicle.
+
+    Loaded once from the active parkings and then kept current by the
+    check-in and exit paths, like the occupancy index, so duplicate checks
+    and type-ahead never query tbl_parking. Plates are held as packed int
+    keys in a dict for membership and in a sorted list for prefix lookups;
+    the odd plate that predates the format check is kept as a string.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_park_id = {}
+        self._counts = {}
+        self._sorted = []
+        self._loaded = False
+
+    def load(self):
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(ACTIVE_PLATES_QUERY)
+            parked = cursor.fetchall()
+
+        with self._lock:
+            self._by_park_id, self._counts, self._sorted = {}, {}, []
+            for park_id, veh_no in parked:
+                self.add(park_id, veh_no)
+            self._loaded = True
+
+    def ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    def _key(self, plate):
+        plate = plate.strip().upper()
+        key = pack_plate(plate)
+        return plate if key is None else key
+
+    def add(self, park_id, plate):
+        with self._lock:
+            if park_id in self._by_park_id:
+                return
+            key = self._key(plate)
+            self._by_park_id[park_id] = key
+            self._counts[key] = self._counts.get(key, 0) + 1
+            if self._counts[key] == 1:
+                insort(self._sorted, plate.strip().upper())
+
+    def remove(self, park_id):
+        with self._lock:
+            key = self._by_park_id.pop(park_id, None)
+            if key is None:
+                return
+            self._counts[key] -= 1
+            if not self._counts[key]:
+                del self._counts[key]
+                plate = key if isinstance(key, str) else unpack_plate(key)
+                del self._sorted[bisect_left(self._sorted, plate)]
+
+    def is_active(self, plate):
+        with self._lock:
+            return self._key(plate) in self._counts
+
+    def suggestions(self, prefix, limit=SUGGESTION_LIMIT):
+        """Returns up to limit parked plates starting with prefix, in order."""
+        prefix = prefix.strip().upper()
+        if not prefix:
+            return []
+        with self._lock:
+            start = bisect_left(self._sorted, prefix)
+            found = []
+            for plate in self._sorted[start:start + limit]:
+                if not plate.startswith(prefix):
+                    break
+                found.append(plate)
+            return found
+
+
+_index = PlateIndex()
+
+
+def get_plate_index():
+    _index.ensure_loaded()
+    return _index
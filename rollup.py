@@ -0,0 +1,138 @@
+"""Daily revenue/sales rollup per date and slot category.
+
+The record_* helpers run on the caller's cursor so the rollup changes
+commit (or roll back) together with the parking/payment writes they
+describe; call bump_data_version() once that transaction has committed.
+Single check-ins are counted by the sp_check_in procedure itself.
+Run ``python rollup.py --rebuild`` to backfill from the fact tables.
+"""
+import sys
+
+from db_connection import db_connection, values_table
+
+# Bumped after every committed rollup write made by this process; readers
+# cache derived data keyed on it. Writes by other processes only show in
+# the token fetch_rollup_token() reads from the table itself.
+_data_version = 0
+
+# MAX is one index read; the count catches rows deleted without a rewrite
+ROLLUP_TOKEN_QUERY = "SELECT MAX(updated_at), COUNT(*) FROM tbl_daily_rollup"
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM tbl_daily_rollup",
+    """
+    INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+    SELECT pr.date, COALESCE(pr.slot_id, 0), COALESCE(SUM(pay.amount), 0), COUNT(*),
+           COALESCE(SUM(pay.status = 'Paid'), 0)
+    FROM tbl_parking pr
+    LEFT JOIN tbl_payment pay ON pay.park_id = pr.park_id
+    GROUP BY pr.date, COALESCE(pr.slot_id, 0)
+    """,
+]
+
+
+def data_version():
+    return _data_version
+
+
+def bump_data_version():
+    global _data_version
+    _data_version += 1
+
+
+def fetch_rollup_token():
+    """Returns a value that changes whenever any process writes tbl_daily_rollup."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ROLLUP_TOKEN_QUERY)
+        return cursor.fetchone()
+
+
+def record_parkings(cursor, park_ids):
+    """Counts a batch of check-ins by park_id. Call after the inserts."""
+    placeholders = ", ".join(["%s"] * len(park_ids))
+    cursor.execute(f"""
+        INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+        SELECT pr.date, COALESCE(pr.slot_id, 0), COALESCE(SUM(pay.amount), 0), COUNT(*), 0
+        FROM tbl_parking pr
+        LEFT JOIN tbl_payment pay ON pay.park_id = pr.park_id
+        WHERE pr.park_id IN ({placeholders})
+        GROUP BY pr.date, COALESCE(pr.slot_id, 0)
+        ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue), parkings = parkings + VALUES(parkings)
+    """, tuple(park_ids))
+
+
+def record_amount_changes(cursor, changes):
+    """Applies a batch of (park_id, delta) payment amount changes in one statement."""
+    table, params = values_table(changes, ("park_id", "delta"))
+    cursor.execute(f"""
+        INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+        SELECT pr.date, COALESCE(pr.slot_id, 0), SUM(c.delta), 0, 0
+        FROM tbl_parking pr
+        JOIN {table} c ON c.park_id = pr.park_id
+        GROUP BY pr.date, COALESCE(pr.slot_id, 0)
+        ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue)
+    """, params)
+
+
+def record_paid(cursor, park_id):
+    """Counts a payment as paid. Call before setting tbl_payment.status."""
+    cursor.execute("""
+        INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+        SELECT pr.date, COALESCE(pr.slot_id, 0), 0, 0, 1
+        FROM tbl_parking pr
+        JOIN tbl_payment pay ON pay.park_id = pr.park_id
+        WHERE pr.park_id = %s AND pay.status <> 'Paid'
+        ON DUPLICATE KEY UPDATE paid = paid + 1
+    """, (park_id,))
+
+
+SERIES_COLUMNS = {"revenue": "SUM(revenue)", "sales": "SUM(parkings)"}
+
+
+def fetch_daily_series(name):
+    """Returns one dashboard series ("revenue" or "sales") as (date, value) rows."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT date, {SERIES_COLUMNS[name]} FROM tbl_daily_rollup GROUP BY date ORDER BY date")
+        return cursor.fetchall()
+
+
+def fetch_daily_totals():
+    """Returns (revenue_data, sales_data) as lists of (date, value) rows."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT date, SUM(revenue), SUM(parkings)
+            FROM tbl_daily_rollup
+            GROUP BY date
+            ORDER BY date
+        """)
+        rows = cursor.fetchall()
+    return [(date, revenue) for date, revenue, _ in rows], [(date, parkings) for date, _, parkings in rows]
+
+
+def rebuild():
+    """Recomputes the rollup from the live tables plus the archived months."""
+    from archive import daily_rollup_rows
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        for statement in REBUILD_STATEMENTS:
+            cursor.execute(statement)
+        cursor.executemany("""
+            INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue), parkings = parkings + VALUES(parkings),
+                                    paid = paid + VALUES(paid)
+        """, daily_rollup_rows())
+        conn.commit()
+    bump_data_version()
+
+
+if __name__ == "__main__":
+    if "--rebuild" not in sys.argv[1:]:
+        print("Usage: python rollup.py --rebuild")
+        sys.exit(1)
+    rebuild()
+    print("tbl_daily_rollup rebuilt.")
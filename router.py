@@ -0,0 +1,74 @@
+import tkinter as tk
+
+from background import get_executor
+
+
+class Router:
+    """Switches between pages inside one container without re-creating them.
+
+    Each page is built once, on its first visit, into its own frame by the
+    registered factory; later visits just re-pack that frame and call the
+    page's on_show(**params) hook, so pages keep their widgets and loaded
+    data across navigation. A page's on_hide() hook runs when another page
+    replaces it or it is closed while shown.
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.factories = {}
+        self.titles = {}
+        self.pages = {}
+        self.frames = {}
+        self.current = None
+
+    def register(self, name, factory, title=None):
+        """factory(frame, **params) builds the page into frame and returns it."""
+        self.factories[name] = factory
+        self.titles[name] = title
+
+    def page(self, name):
+        return self.pages.get(name)
+
+    def show(self, name, **params):
+        if self.current and self.current != name:
+            self.hide(self.current)
+
+        if name in self.pages:
+            page = self.pages[name]
+            if hasattr(page, "on_show"):
+                page.on_show(**params)
+        else:
+            frame = tk.Frame(self.container)
+            self.frames[name] = frame
+            page = self.pages[name] = self.factories[name](frame, **params)
+
+        self.frames[name].pack(fill=tk.BOTH, expand=True)
+        self.current = name
+        if self.titles[name]:
+            self.container.winfo_toplevel().title(self.titles[name])
+        return page
+
+    def close(self, name):
+        """Destroys a page so its next visit builds it from scratch."""
+        page = self.pages.pop(name, None)
+        frame = self.frames.pop(name, None)
+        if page is None:
+            return
+        if self.current == name:
+            if hasattr(page, "on_hide"):
+                page.on_hide()
+            self.current = None
+        if hasattr(page, "close"):
+            page.close()
+        get_executor(self.container).cancel(page)
+        frame.destroy()
+
+    def hide(self, name):
+        page = self.pages.get(name)
+        if hasattr(page, "on_hide"):
+            page.on_hide()
+        self.frames[name].pack_forget()
+
+    def close_all(self):
+        for name in list(self.pages):
+            self.close(name)
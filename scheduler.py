@@ -0,0 +1,113 @@
+"""One coalesced timer for all periodic UI work.
+
+Clocks, counter animations and refresh loops register jobs with the
+root's FrameScheduler instead of running their own ``after`` chains. The
+scheduler keeps a single ``after`` pending, for the earliest due job, and
+runs every job due within COALESCE_MS of it in the same tick. Jobs keep
+a fixed phase on the monotonic clock, so they do not drift however late
+a tick runs, and skip (rather than replay) the ticks they miss. A job
+whose widget is not viewable is skipped; once the widget is destroyed,
+the job is dropped. With nothing due the scheduler does not wake up at
+all.
+
+``python index.py --tick-report`` prints how many ticks ran and what
+they cost when the app exits.
+"""
+import math
+import time
+import traceback
+
+COALESCE_MS = 20
+
+
+class Job:
+    def __init__(self, widget, interval_ms, callback, due):
+        self.widget = widget
+        self.interval = interval_ms / 1000
+        self.callback = callback
+        self.due = due
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FrameScheduler:
+    """Runs periodic jobs from one ``after`` chain on the Tk root.
+
+    A job's callback returning False cancels it, which is how one-off
+    animations end themselves.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._jobs = []
+        self._after_id = None
+        self._wake_at = None
+        self.ticks = 0
+        self.runs = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def every(self, widget, interval_ms, callback, immediate=False):
+        """Calls callback every interval_ms while widget is viewable (widget None: always)."""
+        now = time.monotonic()
+        job = Job(widget, interval_ms, callback, now if immediate else now + interval_ms / 1000)
+        self._jobs.append(job)
+        self._wake(job.due)
+        return job
+
+    def _wake(self, due):
+        if self._wake_at is not None and self._wake_at <= due:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._wake_at = due
+        delay_ms = max(0, math.ceil((due - time.monotonic()) * 1000))
+        self._after_id = self.root.after(delay_ms, self._tick)
+
+    def _tick(self):
+        self._after_id = self._wake_at = None
+        start = time.perf_counter()
+        now = time.monotonic()
+        horizon = now + COALESCE_MS / 1000
+
+        for job in list(self._jobs):
+            if job.cancelled or (job.widget is not None and not job.widget.winfo_exists()):
+                job.cancelled = True
+                continue
+            if job.due > horizon:
+                continue
+            # Stay on the job's phase, skipping ticks missed while paused or late
+            missed = math.floor((now - job.due) / job.interval) if now > job.due else 0
+            job.due += (missed + 1) * job.interval
+            if job.widget is not None and not job.widget.winfo_viewable():
+                continue
+            self.runs += 1
+            try:
+                if job.callback() is False:
+                    job.cancelled = True
+            except Exception as err:
+                traceback.print_exception(type(err), err, err.__traceback__)
+
+        self._jobs = [job for job in self._jobs if not job.cancelled]
+        took_ms = (time.perf_counter() - start) * 1000
+        self.ticks += 1
+        self.total_ms += took_ms
+        self.max_ms = max(self.max_ms, took_ms)
+        if self._jobs:
+            self._wake(min(job.due for job in self._jobs))
+
+    def report(self):
+        """Returns tick counters: ticks, job runs, total and worst tick cost in ms, live jobs."""
+        return {"ticks": self.ticks, "runs": self.runs, "total_ms": self.total_ms,
+                "max_ms": self.max_ms, "jobs": len(self._jobs)}
+
+
+def get_scheduler(widget):
+    """Returns the scheduler bound to the widget's Tk root, creating it on first use."""
+    root = widget._root()
+    scheduler = getattr(root, "_frame_scheduler", None)
+    if scheduler is None:
+        scheduler = root._frame_scheduler = FrameScheduler(root)
+    return scheduler
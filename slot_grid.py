@@ -0,0 +1,142 @@
+import tkinter as tk
+
+FREE_COLOR = "green"
+OCCUPIED_COLOR = "red"
+MIN_CELL_SIZE = 24
+MAX_CELL_SIZE = 120
+
+
+class SlotGrid(tk.Frame):
+    """Bay grid drawn on a single Canvas.
+
+    Only the rows inside the viewport have canvas items, clicks are mapped
+    back to a bay number arithmetically, and refresh() recolours just the
+    cells whose occupancy changed since they were last drawn.
+    """
+
+    def __init__(self, parent, slot_id, total_slots, is_occupied, on_click, cell_size=56, height=480):
+        super().__init__(parent, bg="white", bd=2, relief="solid")
+        self.slot_id = slot_id
+        self.total_slots = total_slots
+        self.is_occupied = is_occupied
+        self.on_click = on_click
+        self.cell_size = cell_size
+        self.columns = 10
+
+        self.canvas = tk.Canvas(self, bg="white", height=height, width=10 * cell_size, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.cells = {}         # slot_number -> (rectangle id, text id)
+        self.drawn_rows = set()
+        self.drawn_state = {}   # slot_number -> occupied flag currently painted
+
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-3, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(3, "units"))
+        self.canvas.bind("<Control-MouseWheel>", lambda e: self.zoom(1.25 if e.delta > 0 else 0.8))
+        self.canvas.bind("<Control-Button-4>", lambda e: self.zoom(1.25))
+        self.canvas.bind("<Control-Button-5>", lambda e: self.zoom(0.8))
+
+        self.layout()
+
+    @property
+    def rows(self):
+        return (self.total_slots + self.columns - 1) // self.columns
+
+    def layout(self):
+        """Drops every drawn cell and lays the grid out for the current size and zoom."""
+        self.canvas.delete("cell")
+        self.cells.clear()
+        self.drawn_rows.clear()
+        self.drawn_state.clear()
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_size, self.rows * self.cell_size),
+                              yscrollincrement=max(1, self.cell_size // 2))
+        self.render()
+
+    def on_resize(self, event):
+        columns = max(1, event.width // self.cell_size)
+        if columns != self.columns:
+            self.columns = columns
+            self.layout()
+        else:
+            self.render()
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.render()
+
+    def on_mousewheel(self, event):
+        self.canvas.yview_scroll(-3 if event.delta > 0 else 3, "units")
+
+    def zoom(self, factor):
+        cell_size = int(min(MAX_CELL_SIZE, max(MIN_CELL_SIZE, self.cell_size * factor)))
+        if cell_size == self.cell_size:
+            return
+        top_row = int(self.canvas.canvasy(0) // self.cell_size)
+        self.cell_size = cell_size
+        self.columns = max(1, self.canvas.winfo_width() // cell_size)
+        self.layout()
+        self.canvas.yview_moveto(top_row / max(1, self.rows))
+
+    def render(self):
+        """Creates items for rows scrolling into view and deletes those leaving it."""
+        top = self.canvas.canvasy(0)
+        bottom = top + max(self.canvas.winfo_height(), int(self.canvas.cget("height")))
+        first_row = max(0, int(top // self.cell_size))
+        last_row = min(self.rows - 1, int(bottom // self.cell_size))
+        visible = set(range(first_row, last_row + 1))
+
+        for row in self.drawn_rows - visible:
+            self.canvas.delete(f"row{row}")
+            for slot_number in self.row_slots(row):
+                self.cells.pop(slot_number, None)
+                self.drawn_state.pop(slot_number, None)
+        for row in visible - self.drawn_rows:
+            self.draw_row(row)
+        self.drawn_rows = visible
+
+    def row_slots(self, row):
+        start = row * self.columns + 1
+        return range(start, min(start + self.columns, self.total_slots + 1))
+
+    def draw_row(self, row):
+        size = self.cell_size
+        pad = max(2, size // 12)
+        font = ("Arial", max(6, size // 5), "bold")
+        tags = ("cell", f"row{row}")
+        for col, slot_number in enumerate(self.row_slots(row)):
+            occupied = self.is_occupied(slot_number)
+            x0, y0 = col * size + pad, row * size + pad
+            rect = self.canvas.create_rectangle(x0, y0, x0 + size - 2 * pad, y0 + size - 2 * pad,
+                                                fill=OCCUPIED_COLOR if occupied else FREE_COLOR,
+                                                outline="#333333", width=2, tags=tags)
+            text = self.canvas.create_text(x0 + size / 2 - pad, y0 + size / 2 - pad, text=str(slot_number),
+                                           fill="white", font=font, tags=tags)
+            self.cells[slot_number] = (rect, text)
+            self.drawn_state[slot_number] = occupied
+
+    def refresh(self):
+        """Recolours only the drawn cells whose occupancy changed."""
+        for slot_number, (rect, _) in self.cells.items():
+            occupied = self.is_occupied(slot_number)
+            if self.drawn_state[slot_number] != occupied:
+                self.canvas.itemconfigure(rect, fill=OCCUPIED_COLOR if occupied else FREE_COLOR)
+                self.drawn_state[slot_number] = occupied
+
+    def slot_at(self, x, y):
+        col = int(self.canvas.canvasx(x) // self.cell_size)
+        row = int(self.canvas.canvasy(y) // self.cell_size)
+        if col >= self.columns:
+            return None
+        slot_number = row * self.columns + col + 1
+        return slot_number if 1 <= slot_number <= self.total_slots else None
+
+    def on_canvas_click(self, event):
+        slot_number = self.slot_at(event.x, event.y)
+        if slot_number is not None:
+            self.on_click(self.slot_id, slot_number)
@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox
-from db_connection import connect_to_db
-from parking import ParkingPage
+from checkin import active_park_id, check_out
+from db_connection import db_connection
+from occupancy import get_occupancy_index
+from slot_grid import SlotGrid
 
 class SlotLayoutPage:
-    def __init__(self, root, slot_id=None):
+    def __init__(self, root, slot_id=None, router=None):
         self.root = root
+        self.router = router
         self.slot_id = slot_id
+        self.slot_grid = None
         self.root.configure(bg="#EAF2F8")
         self.build_page()
 
@@ -30,13 +34,25 @@ class SlotLayoutPage:
 
         self.load_slot_categories()
 
+    def on_show(self):
+        """Repaints bays that changed while another page was open."""
+        if self.slot_grid is not None and self.slot_grid.winfo_exists():
+            self.slot_grid.refresh()
+        else:
+            self.show_categories()
+
+    def show_categories(self):
+        self.slot_id = None
+        self.slot_grid = None
+        self.clear_frame()
+        self.load_slot_categories()
+
     def load_slot_categories(self):
         """Loads slot categories and arranges buttons from left to right in a row."""
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT slot_id, slotname, number_of_slots FROM tbl_slots WHERE status = 'Active'")
-        slots = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT slot_id, slotname, number_of_slots FROM tbl_slots WHERE status = 'Active'")
+            slots = cursor.fetchall()
 
         # Create a frame to hold the buttons horizontally
         button_container = tk.Frame(self.scroll_frame, bg="white")
@@ -44,9 +60,11 @@ class SlotLayoutPage:
 
         max_columns = 5  # Number of buttons in a row before wrapping
         row, col = 0, 0
+        occupancy = get_occupancy_index()
 
         for slot_id, slotname, number_of_slots in slots:
-            btn = tk.Button(button_container, text=f"{slotname}\n({number_of_slots} slots)",
+            free, total = occupancy.counts(slot_id)
+            btn = tk.Button(button_container, text=f"{slotname}\n({free}/{total} free)",
                             font=("Arial", 20, "bold"), bg="#010f26", fg="white",
                             width=20, height=4, relief="raised", bd=3,
                             command=lambda sid=slot_id: self.show_slot_layout(sid))
@@ -65,16 +83,17 @@ class SlotLayoutPage:
         self.slot_id = slot_id  # Store the selected slot category for reload
         self.clear_frame()
 
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT slotname, number_of_slots FROM tbl_slots WHERE slot_id = %s", (slot_id,))
-        result = cursor.fetchone()
+        occupancy = get_occupancy_index()
+        result = occupancy.category(slot_id)
         if not result:
             messagebox.showerror("Error", "Slot category not found!")
             return
 
         slotname, total_slots = result
 
+        tk.Button(self.scroll_frame, text="⬅ All Categories", font=("Arial", 11, "bold"),
+                  bg="#010f26", fg="white", command=self.show_categories).pack(anchor="w", padx=10, pady=5)
+
         tk.Label(self.scroll_frame, text=f"{slotname} Slot Layout", 
                 font=("Arial", 20, "bold"), 
                 bg="white",  # Dark red Background
@@ -82,38 +101,15 @@ class SlotLayoutPage:
                 padx=10, pady=5
                 ).pack(fill=tk.X, pady=5)
 
-        # Fetch slot statuses from tbl_parking and check if status is 'Parked'
-        cursor.execute("SELECT slot_number, status FROM tbl_parking WHERE slot_id = %s", (slot_id,))
-        occupied_slots = {row[0] for row in cursor.fetchall() if row[1] == 'Parked'}
-        conn.close()
-
-        # Grid container with padding for better visibility
-        grid_container = tk.Frame(self.scroll_frame, bg="white", padx=10, pady=10, bd=2, relief="solid")
-        grid_container.pack(pady=10)
-
-        rows = total_slots // 10 + (1 if total_slots % 10 else 0)
-        cols = min(10, total_slots)  # Max 10 slots per row
-
-        for i in range(rows):
-            row_frame = tk.Frame(grid_container, bg="white")
-            row_frame.pack(pady=3)
-
-            for j in range(cols):
-                slot_number = i * 10 + j + 1
-                if slot_number > total_slots:
-                    break
-
-                is_occupied = slot_number in occupied_slots
-                color = "red" if is_occupied else "green"  # Dark blue for free slots
-                btn = tk.Button(row_frame, text=str(slot_number), bg=color, fg="white",
-                                font=("Arial", 10, "bold"), width=5, height=2,
-                                bd=3, relief="raised",  # Border for slot buttons
-                                command=lambda sn=slot_number, occupied=is_occupied: self.handle_slot_click(slot_id, sn, occupied))
-                btn.pack(side="left", padx=5, pady=3)
-   
-    def handle_slot_click(self, slot_id, slot_number, is_occupied):
+        # One canvas for the whole lot; only bays in view are drawn
+        self.slot_grid = SlotGrid(self.scroll_frame, slot_id, total_slots,
+                                  is_occupied=lambda sn: occupancy.is_occupied(slot_id, sn),
+                                  on_click=self.handle_slot_click)
+        self.slot_grid.pack(pady=10, padx=10, fill=tk.X)
+
+    def handle_slot_click(self, slot_id, slot_number):
         """Handles clicking on a slot - Either Reserve or Remove from Parking."""
-        if is_occupied:
+        if get_occupancy_index().is_occupied(slot_id, slot_number):
             self.remove_from_parking(slot_id, slot_number)
         else:
             self.reserve_slot(slot_id, slot_number)
@@ -124,22 +120,20 @@ class SlotLayoutPage:
         if not confirm:
             return
 
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE tbl_parking SET status = 'Exited' WHERE slot_id = %s AND slot_number = %s", (slot_id, slot_number))
-        conn.commit()
-        conn.close()
+        park_id = active_park_id(slot_id, slot_number)
+        if park_id is None or not check_out(park_id):
+            # Already exited elsewhere (another gate or the sweeper)
+            get_occupancy_index().release(slot_id, slot_number)
+            self.slot_grid.refresh()
+            messagebox.showwarning("Remove Parking", f"Slot {slot_number} has no active parking.")
+            return
 
         messagebox.showinfo("Success", f"Slot {slot_number} is now free!")
-        self.show_slot_layout(slot_id)  # Reload same slot layout after removing parking
+        self.slot_grid.refresh()  # Repaint only the bays that changed
 
     def reserve_slot(self, slot_id, slot_number):
         """Opens the parking form in full-screen mode when a free slot is clicked."""
-        self.root.destroy()
-        root = tk.Tk()
-        root.attributes('-fullscreen', True)  # Full-screen mode
-        ParkingPage(root, slot_id, slot_number)
-        root.mainloop()
+        self.router.show("parking", slot_id=slot_id, slot_number=slot_number)
 
     def clear_frame(self):
         """Clears the frame to dynamically update content."""
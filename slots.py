@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
-from db_connection import connect_to_db
+from db_connection import db_connection
+from occupancy import get_occupancy_index
+from tariff import get_tariff_engine
 
 class SlotsPage:
     def __init__(self, root):
@@ -21,18 +23,19 @@ class SlotsPage:
         style.configure("Treeview", font=("Arial", 12), rowheight=30)
         style.configure("Treeview.Heading", font=("Arial", 12, "bold"), background="#010f26", foreground="black")
 
-        self.slot_table = ttk.Treeview(self.root, columns=("slot_id", "Name", "Fare", "Number of Slots", "Status"), show='headings')
+        self.slot_table = ttk.Treeview(self.root, columns=("slot_id", "Name", "Fare", "Number of Slots", "Status", "Daily Cap"), show='headings')
         self.slot_table.heading("slot_id", text="ID")
         self.slot_table.heading("Name", text="Slot Name")
         self.slot_table.heading("Fare", text="Fare (₹)")
         self.slot_table.heading("Number of Slots", text="Number of Slots")
         self.slot_table.heading("Status", text="Status")
+        self.slot_table.heading("Daily Cap", text="Daily Cap (₹)")
 
         # Alternating row colors
         self.slot_table.tag_configure('oddrow', background="#f9f9f9")
         self.slot_table.tag_configure('evenrow', background="white")
 
-        for col in ("slot_id", "Name", "Fare", "Number of Slots", "Status"):
+        for col in ("slot_id", "Name", "Fare", "Number of Slots", "Status", "Daily Cap"):
             self.slot_table.column(col, anchor='center')
 
         self.slot_table.pack(pady=10, padx=10)
@@ -45,14 +48,15 @@ class SlotsPage:
     def show_add_slot_form(self):
         self._create_slot_form("Add Slot", self.add_slot)
 
-    def show_edit_slot_form(self, slot_id, current_name, current_fare, current_number):
-        self._create_slot_form("Edit Slot", lambda name, fare, number, win: self.update_slot(slot_id, name, fare, number, win),
-                               current_name, current_fare, current_number)
+    def show_edit_slot_form(self, slot_id, current_name, current_fare, current_number, current_cap=""):
+        self._create_slot_form("Edit Slot",
+                               lambda name, fare, number, cap, win: self.update_slot(slot_id, name, fare, number, cap, win),
+                               current_name, current_fare, current_number, current_cap)
 
-    def _create_slot_form(self, title, submit_command, current_name="", current_fare="", current_number=""):
+    def _create_slot_form(self, title, submit_command, current_name="", current_fare="", current_number="", current_cap=""):
         form_window = tk.Toplevel(self.root)
         form_window.title(title)
-        form_window.geometry("400x300")
+        form_window.geometry("400x350")
         form_window.configure(bg="#EAF2F8")
         form_window.resizable(False, False)
 
@@ -77,55 +81,75 @@ class SlotsPage:
         number_entry.insert(0, current_number)
         number_entry.grid(row=2, column=1, padx=10, pady=8, ipadx=5, sticky="ew")
 
+        tk.Label(form_frame, text="Daily Cap (₹)", font=("Arial", 12, "bold"), bg="#EAF2F8", fg="#010f26").grid(row=3, column=0, padx=10, pady=8, sticky="w")
+        cap_entry = tk.Entry(form_frame, font=("Arial", 12), bd=2, relief="solid")
+        cap_entry.insert(0, current_cap)
+        cap_entry.grid(row=3, column=1, padx=10, pady=8, ipadx=5, sticky="ew")
+
         submit_text = "✅ Add Slot" if title == "Add Slot" else "✅ Update Slot"
         submit_color = "#27AE60" if title == "Add Slot" else "#3498DB"
 
         tk.Button(form_frame, text=submit_text, font=("Arial", 13, "bold"), bg=submit_color, fg="white",
                   activebackground="#229954" if title == "Add Slot" else "#2980B9",
                   padx=10, pady=5, bd=0,
-                  command=lambda: submit_command(slot_name_var.get(), fare_entry.get(), number_entry.get(), form_window)).grid(row=3, columnspan=2, pady=10)
+                  command=lambda: submit_command(slot_name_var.get(), fare_entry.get(), number_entry.get(),
+                                                 cap_entry.get().strip(), form_window)).grid(row=4, columnspan=2, pady=10)
 
-    def add_slot(self, slot_name, fare, number_of_slots, form_window):
+    def validate_slot(self, slot_name, fare, number_of_slots, daily_cap):
         if not slot_name or not fare or not number_of_slots:
             messagebox.showerror("Error", "All fields are required!")
-            return
+            return False
 
-        if not fare.isdigit() or not number_of_slots.isdigit():
+        # Fares come back from the table as DECIMAL text such as "10.00"
+        if not fare.replace(".", "", 1).isdigit() or not number_of_slots.isdigit():
             messagebox.showerror("Error", "Fare and Number of Slots must be valid numbers!")
+            return False
+
+        if daily_cap and not daily_cap.replace(".", "", 1).isdigit():
+            messagebox.showerror("Error", "Daily Cap must be a valid number or left empty!")
+            return False
+        return True
+
+    def add_slot(self, slot_name, fare, number_of_slots, daily_cap, form_window):
+        if not self.validate_slot(slot_name, fare, number_of_slots, daily_cap):
             return
 
         fare = float(fare)
         number_of_slots = int(number_of_slots)
-
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO tbl_slots (slotname, fare, number_of_slots, status) VALUES (%s, %s, %s, %s)", 
-                       (slot_name, fare, number_of_slots, 'Active'))
-        conn.commit()
-        conn.close()
+        daily_cap = float(daily_cap) if daily_cap else None
+
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO tbl_slots (slotname, fare, number_of_slots, status, daily_cap) VALUES (%s, %s, %s, %s, %s)", 
+                           (slot_name, fare, number_of_slots, 'Active', daily_cap))
+            conn.commit()
+            slot_id = cursor.lastrowid
+        get_occupancy_index().set_category(slot_id, slot_name, number_of_slots)
+        get_tariff_engine().reload_category(slot_id)
         messagebox.showinfo("Success", "Slot added successfully!")
         form_window.destroy()
         self.load_slots()
 
-    def update_slot(self, slot_id, slot_name, fare, number_of_slots, form_window):
-        if not slot_name or not fare or not number_of_slots:
-            messagebox.showerror("Error", "All fields are required!")
-            return
-
-        if not fare.isdigit() or not number_of_slots.isdigit():
-            messagebox.showerror("Error", "Fare and Number of Slots must be valid numbers!")
+    def update_slot(self, slot_id, slot_name, fare, number_of_slots, daily_cap, form_window):
+        if not self.validate_slot(slot_name, fare, number_of_slots, daily_cap):
             return
 
         fare = float(fare)
         number_of_slots = int(number_of_slots)
-
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE tbl_slots SET slotname = %s, fare = %s, number_of_slots = %s WHERE slot_id = %s", 
-                       (slot_name, fare, number_of_slots, slot_id))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo("Success", "Slot updated successfully!")
+        daily_cap = float(daily_cap) if daily_cap else None
+
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE tbl_slots SET slotname = %s, fare = %s, number_of_slots = %s, daily_cap = %s WHERE slot_id = %s", 
+                           (slot_name, fare, number_of_slots, daily_cap, slot_id))
+            conn.commit()
+        get_occupancy_index().set_category(slot_id, slot_name, number_of_slots)
+
+        # Open tickets follow the new rates
+        tariffs = get_tariff_engine()
+        tariffs.reload_category(slot_id)
+        repriced = tariffs.reprice_open_tickets(slot_id)
+        messagebox.showinfo("Success", f"Slot updated successfully!\n{repriced} open ticket(s) re-priced.")
         form_window.destroy()
         self.load_slots()
 
@@ -138,17 +162,16 @@ class SlotsPage:
         item = self.slot_table.item(selected_item)
         values = item['values']
         if values:
-            self.show_edit_slot_form(values[0], values[1], values[2], values[3])
+            self.show_edit_slot_form(values[0], values[1], values[2], values[3], values[5])
 
     def load_slots(self):
         for row in self.slot_table.get_children():
             self.slot_table.delete(row)
 
-        conn = connect_to_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM tbl_slots")
-        slots = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT slot_id, slotname, fare, number_of_slots, status, IFNULL(daily_cap, '') FROM tbl_slots")
+            slots = cursor.fetchall()
 
         for i, slot in enumerate(slots):
             self.slot_table.insert('', tk.END, values=slot, tags=("evenrow" if i % 2 == 0 else "oddrow"))
@@ -0,0 +1,50 @@
+"""Startup instrumentation.
+
+``python index.py --startup-report`` prints when the landing page first
+painted and how long every lazily imported page module took to load.
+``python index.py --check-startup-budget [ms]`` exits non-zero when time
+to first paint goes over the budget, for use as a regression check.
+"""
+import importlib
+import sys
+import time
+
+STARTUP_BUDGET_MS = 1500
+
+_started = time.perf_counter()
+_events = []
+enabled = False
+
+
+def elapsed_ms():
+    return (time.perf_counter() - _started) * 1000
+
+
+def record(label, duration_ms=None):
+    at = elapsed_ms()
+    _events.append((label, at, duration_ms))
+    if enabled:
+        took = f" ({duration_ms:.1f} ms)" if duration_ms is not None else ""
+        print(f"[startup] {at:8.1f} ms  {label}{took}", file=sys.stderr)
+
+
+def lazy_import(name):
+    """Imports a module on first use, recording how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    record(f"import {name}", (time.perf_counter() - start) * 1000)
+    return module
+
+
+def first_paint_ms(root):
+    """Forces the pending draw of root and returns the time to first paint."""
+    root.update()
+    record("first paint")
+    return elapsed_ms()
+
+
+def events():
+    return list(_events)
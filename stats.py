@@ -0,0 +1,66 @@
+"""Live figures for the landing page's Statistics cards.
+
+All four come from one query (the active tables' indexes plus the daily
+rollup) behind a process-wide TTL cache, so however many times the page
+is opened, the database sees at most one query per STATS_TTL seconds.
+"""
+import threading
+import time
+
+from db_connection import db_connection
+
+STATS_TTL = 30
+
+STATISTICS_QUERY = """
+    SELECT
+        (SELECT COALESCE(SUM(number_of_slots), 0) FROM tbl_slots WHERE status = 'Active'),
+        (SELECT COUNT(*) FROM tbl_parking WHERE status = 'Parked'),
+        (SELECT COALESCE(SUM(parkings), 0) FROM tbl_daily_rollup WHERE date = CURDATE()),
+        (SELECT COALESCE(SUM(revenue), 0) FROM tbl_daily_rollup
+         WHERE date >= DATE_SUB(CURDATE(), INTERVAL DAYOFMONTH(CURDATE()) - 1 DAY))
+"""
+
+
+class TTLCache:
+    """Caches one loader's result for ttl seconds; concurrent callers share a single load."""
+
+    def __init__(self, loader, ttl):
+        self.loader = loader
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+
+    def peek(self):
+        """Returns the cached value if it is still fresh, else None (never loads)."""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return self._value
+        return None
+
+    def get(self):
+        with self._lock:
+            value = self.peek()
+            if value is None:
+                value = self._value = self.loader()
+                self._loaded_at = time.monotonic()
+            return value
+
+
+def fetch_statistics():
+    """Returns (total_spots, available_now, checkins_today, revenue_this_month)."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(STATISTICS_QUERY)
+        capacity, parked, checkins_today, revenue = cursor.fetchone()
+    return int(capacity), max(0, int(capacity) - int(parked)), int(checkins_today), int(revenue)
+
+
+_statistics = TTLCache(fetch_statistics, STATS_TTL)
+
+
+def live_statistics():
+    return _statistics.get()
+
+
+def cached_statistics():
+    return _statistics.peek()
@@ -0,0 +1,95 @@
+"""Expiry sweeper for parkings that outstay their booked exit_time.
+
+Every sweep finds the overdue parkings with one range query on
+idx_parking_status_exit, charges OVERSTAY_RATE for every started hour
+past exit_time that has not been charged yet (tracked in
+tbl_parking.overstay_hours) and releases bays still held
+AUTO_RELEASE_HOURS after exit_time. Both writes are batched statements
+in one transaction. The app runs it every SWEEP_INTERVAL_MS; run
+``python sweeper.py`` for a single sweep.
+"""
+import threading
+
+from background import get_executor
+from db_connection import db_connection, values_table
+from occupancy import get_occupancy_index
+from plates import get_plate_index
+from rollup import bump_data_version, record_amount_changes
+from scheduler import get_scheduler
+from tariff import OVERSTAY_RATE
+
+SWEEP_INTERVAL_MS = 60_000
+GRACE_MINUTES = 15
+AUTO_RELEASE_HOURS = 24
+BATCH_SIZE = 500
+
+OVERDUE_QUERY = """
+    SELECT park_id, slot_id, slot_number, overstay_hours,
+           CEIL(TIMESTAMPDIFF(MINUTE, exit_time, NOW()) / 60)
+    FROM tbl_parking
+    WHERE status = 'Parked' AND exit_time < NOW() - INTERVAL %s MINUTE
+    FOR UPDATE
+"""
+
+_sweep_lock = threading.Lock()
+
+
+def find_overdue(cursor, grace_minutes):
+    """Locks and returns (park_id, slot_id, slot_number, charged_hours, overdue_hours) rows."""
+    cursor.execute(OVERDUE_QUERY, (grace_minutes,))
+    return cursor.fetchall()
+
+
+def charge_overstays(cursor, charges, rate):
+    """Adds the overstay charge for a batch of (park_id, hours, extra_hours) rows."""
+    record_amount_changes(cursor, [(park_id, extra_hours * rate) for park_id, _, extra_hours in charges])
+    table, params = values_table(charges, ("park_id", "hours", "extra_hours"))
+    cursor.execute(f"""
+        UPDATE tbl_payment pay
+        JOIN tbl_parking pr ON pr.park_id = pay.park_id
+        JOIN {table} c ON c.park_id = pr.park_id
+        SET pay.amount = pay.amount + c.extra_hours * %s, pr.overstay_hours = c.hours
+    """, params + (rate,))
+
+
+def release_parkings(cursor, park_ids):
+    placeholders = ", ".join(["%s"] * len(park_ids))
+    cursor.execute(f"UPDATE tbl_parking SET status = 'Exited' WHERE park_id IN ({placeholders}) "
+                   "AND status = 'Parked'", tuple(park_ids))
+
+
+def sweep(grace_minutes=GRACE_MINUTES, rate=OVERSTAY_RATE, release_after_hours=AUTO_RELEASE_HOURS):
+    """Charges and releases overdue parkings; returns (charged, released) park_id lists."""
+    with _sweep_lock, db_connection() as conn:
+        cursor = conn.cursor()
+        overdue = find_overdue(cursor, grace_minutes)
+
+        charges = [(park_id, int(hours), int(hours) - charged)
+                   for park_id, _, _, charged, hours in overdue if hours > charged]
+        released = [(park_id, slot_id, slot_number) for park_id, slot_id, slot_number, _, hours in overdue
+                    if release_after_hours is not None and hours >= release_after_hours]
+
+        for start in range(0, len(charges), BATCH_SIZE):
+            charge_overstays(cursor, charges[start:start + BATCH_SIZE], rate)
+        for start in range(0, len(released), BATCH_SIZE):
+            release_parkings(cursor, [park_id for park_id, _, _ in released[start:start + BATCH_SIZE]])
+        conn.commit()
+
+    if charges:
+        bump_data_version()
+    index = get_occupancy_index()
+    plates = get_plate_index()
+    for park_id, slot_id, slot_number in released:
+        index.release(slot_id, slot_number)
+        plates.remove(park_id)
+    return [park_id for park_id, _, _ in charges], [park_id for park_id, _, _ in released]
+
+
+def schedule(root, interval_ms=SWEEP_INTERVAL_MS):
+    """Runs sweep() on the query executor every interval_ms while the app is running."""
+    get_scheduler(root).every(None, interval_ms, lambda: get_executor(root).submit(sweep, None))
+
+
+if __name__ == "__main__":
+    charged, released = sweep()
+    print(f"Charged {len(charged)} overstay(s), released {len(released)} bay(s).")
@@ -0,0 +1,171 @@
+"""Tariff engine.
+
+Every slot category has a rate table: its tbl_slots.fare per hour, then
+optional tiers from tbl_tariff_tiers (the rate per hour once a given
+number of hours has elapsed within each 24-hour block of the stay), and
+an optional tbl_slots.daily_cap that limits each 24-hour block. The tables are loaded once and kept in memory, so pricing a
+ticket never touches the database; re-pricing open tickets after a fare
+change prices each distinct open duration once and updates the rollup
+and the amounts with one statement each.
+"""
+import threading
+from decimal import Decimal
+
+from db_connection import db_connection, values_table
+from rollup import bump_data_version
+
+# Hourly fare for parkings whose slot category is missing.
+DEFAULT_FARE = Decimal(10)
+# Charged per started hour past the booked exit time (see sweeper.py).
+OVERSTAY_RATE = Decimal(20)
+
+OPEN_DURATIONS_QUERY = """
+    SELECT DISTINCT COALESCE(pr.hours_parked, 1)
+    FROM tbl_parking pr
+    JOIN tbl_payment pay ON pay.park_id = pr.park_id
+    WHERE pr.slot_id = %s AND pr.status = 'Parked' AND pay.status <> 'Paid'
+"""
+
+
+def rate_queries(slot_id=None):
+    """Returns (sql, params) for the categories' fares and for their tiers, of one category or all."""
+    where = "WHERE slot_id = %s" if slot_id is not None else ""
+    params = (slot_id,) if slot_id is not None else ()
+    return [(f"SELECT slot_id, fare, daily_cap FROM tbl_slots {where}", params),
+            (f"SELECT slot_id, from_hour, rate FROM tbl_tariff_tiers {where}", params)]
+
+
+def reprice_queries(slot_id, prices):
+    """Returns (sql, params) for the rollup delta and the amount update of re-pricing a category.
+
+    ``prices`` are (hours, price) pairs for the open durations. The rollup
+    needs the old amounts, so its statement must run first.
+    """
+    table, params = values_table(prices, ("hours", "price"))
+    rollup = (f"""
+        INSERT INTO tbl_daily_rollup (date, slot_id, revenue, parkings, paid)
+        SELECT pr.date, pr.slot_id, SUM(c.price + pr.overstay_hours * %s - pay.amount), 0, 0
+        FROM tbl_parking pr
+        JOIN tbl_payment pay ON pay.park_id = pr.park_id
+        JOIN {table} c ON c.hours = COALESCE(pr.hours_parked, 1)
+        WHERE pr.slot_id = %s AND pr.status = 'Parked' AND pay.status <> 'Paid'
+          AND pay.amount <> c.price + pr.overstay_hours * %s
+        GROUP BY pr.date, pr.slot_id
+        ON DUPLICATE KEY UPDATE revenue = revenue + VALUES(revenue)
+    """, (OVERSTAY_RATE,) + params + (slot_id, OVERSTAY_RATE))
+    update = (f"""
+        UPDATE tbl_payment pay
+        JOIN tbl_parking pr ON pr.park_id = pay.park_id
+        JOIN {table} c ON c.hours = COALESCE(pr.hours_parked, 1)
+        SET pay.amount = c.price + pr.overstay_hours * %s
+        WHERE pr.slot_id = %s AND pr.status = 'Parked' AND pay.status <> 'Paid'
+          AND pay.amount <> c.price + pr.overstay_hours * %s
+    """, params + (OVERSTAY_RATE, slot_id, OVERSTAY_RATE))
+    return [rollup, update]
+
+
+class RateTable:
+    """Hourly rate bands and an optional daily cap for one slot category."""
+
+    def __init__(self, fare, tiers=(), daily_cap=None):
+        # (from_hour, rate) bands; the base fare applies from hour 0
+        self.bands = [(0, Decimal(fare))] + sorted((hour, Decimal(rate)) for hour, rate in tiers if hour > 0)
+        self.daily_cap = Decimal(daily_cap) if daily_cap is not None else None
+        self._full_day = self.day_price(24)
+
+    def day_price(self, hours):
+        total = Decimal(0)
+        for i, (start, rate) in enumerate(self.bands):
+            if hours <= start:
+                break
+            end = self.bands[i + 1][0] if i + 1 < len(self.bands) else hours
+            total += (min(hours, end) - start) * rate
+        if self.daily_cap is not None:
+            total = min(total, self.daily_cap)
+        return total
+
+    def price(self, hours):
+        """Prices a stay of the given hours (at least one is charged)."""
+        days, rest = divmod(max(1, int(hours)), 24)
+        return days * self._full_day + self.day_price(rest)
+
+
+class TariffEngine:
+    """In-memory rate tables of every slot category."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables = {}
+        self._default = RateTable(DEFAULT_FARE)
+        self._loaded = False
+
+    def _fetch(self, cursor, slot_id=None):
+        categories_query, tiers_query = rate_queries(slot_id)
+        cursor.execute(*categories_query)
+        categories = cursor.fetchall()
+        cursor.execute(*tiers_query)
+        tiers = {}
+        for tier_slot_id, from_hour, rate in cursor.fetchall():
+            tiers.setdefault(tier_slot_id, []).append((from_hour, rate))
+        return {category_id: RateTable(fare, tiers.get(category_id, ()), daily_cap)
+                for category_id, fare, daily_cap in categories}
+
+    def load(self):
+        with db_connection() as conn:
+            tables = self._fetch(conn.cursor())
+        with self._lock:
+            self._tables = tables
+            self._loaded = True
+
+    def ensure_loaded(self):
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    def reload_category(self, slot_id):
+        """Re-reads one category's rates, e.g. after its fare was edited."""
+        with db_connection() as conn:
+            tables = self._fetch(conn.cursor(), slot_id)
+        with self._lock:
+            self._tables.pop(slot_id, None)
+            self._tables.update(tables)
+
+    def rate_table(self, slot_id):
+        with self._lock:
+            return self._tables.get(slot_id, self._default)
+
+    def price(self, slot_id, hours):
+        return self.rate_table(slot_id).price(hours)
+
+    def reprice_open_tickets(self, slot_id):
+        """Re-prices every unpaid, active ticket of a category; returns how many changed.
+
+        Only the distinct durations are priced here, with the cached rate
+        table (tiers and caps do not map onto one SQL expression); the
+        rollup and the amounts are then updated set-based, each by one
+        statement joining those prices.
+        """
+        table = self.rate_table(slot_id)
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(OPEN_DURATIONS_QUERY, (slot_id,))
+            durations = [hours for hours, in cursor.fetchall()]
+            if not durations:
+                return 0
+
+            for statement in reprice_queries(slot_id, [(hours, table.price(hours)) for hours in durations]):
+                cursor.execute(*statement)
+            changed = cursor.rowcount
+            conn.commit()
+
+        if changed:
+            bump_data_version()
+        return changed
+
+
+_engine = TariffEngine()
+
+
+def get_tariff_engine():
+    _engine.ensure_loaded()
+    return _engine
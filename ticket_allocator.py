@@ -0,0 +1,92 @@
+import datetime
+import threading
+
+from db_connection import db_connection
+
+LAST_TICKET_QUERY = "SELECT ticket_number FROM tbl_payment WHERE ticket_number LIKE %s ORDER BY ticket_number DESC LIMIT 1"
+
+
+def format_ticket(year, number):
+    """Formats a ticket number as PK-YY-NNNN.
+
+    Suffixes wider than four digits carry a width marker (A = 5 digits,
+    B = 6, ...). Letters sort after digits, so plain string ordering of
+    ticket numbers still follows issue order once 9999 is passed.
+    """
+    digits = str(number)
+    if len(digits) <= 4:
+        return f"PK-{year}-{number:04d}"
+    return f"PK-{year}-{chr(ord('A') + len(digits) - 5)}{digits}"
+
+
+def parse_ticket_suffix(ticket_number):
+    suffix = ticket_number.rsplit("-", 1)[-1]
+    if suffix[:1].isalpha():
+        suffix = suffix[1:]
+    return int(suffix)
+
+
+class TicketAllocator:
+    """Hands out ticket numbers from blocks reserved on a sequence row.
+
+    Each process reserves ``block_size`` numbers at a time with a single
+    atomic UPDATE on tbl_sequence, so concurrent gates can never mint the
+    same number and allocation cost does not depend on the size of
+    tbl_payment. Numbers left in a block when the process exits are skipped.
+    """
+
+    def __init__(self, block_size=50):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._year = None
+        self._next = 0
+        self._end = 0
+
+    def next_ticket(self):
+        return self.allocate(1)[0]
+
+    def allocate(self, count):
+        tickets = []
+        with self._lock:
+            year = datetime.datetime.now().year % 100
+            if year != self._year:
+                self._year = year
+                self._next = self._end = 0
+            while len(tickets) < count:
+                if self._next >= self._end:
+                    wanted = max(self.block_size, count - len(tickets))
+                    self._next, self._end = self._reserve_block(year, wanted)
+                tickets.append(format_ticket(year, self._next))
+                self._next += 1
+        return tickets
+
+    def _reserve_block(self, year, size):
+        name = f"ticket-{year}"
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("UPDATE tbl_sequence SET next_value = LAST_INSERT_ID(next_value + %s) WHERE name = %s",
+                           (size, name))
+            if cursor.rowcount == 0:
+                # First ticket of the year (or first run after upgrading):
+                # continue from the highest number already issued.
+                cursor.execute(LAST_TICKET_QUERY, (f"PK-{year}-%",))
+                last_ticket = cursor.fetchone()
+                start = parse_ticket_suffix(last_ticket[0]) + 1 if last_ticket else 1
+                cursor.execute("INSERT IGNORE INTO tbl_sequence (name, next_value) VALUES (%s, %s)", (name, start))
+                cursor.execute("UPDATE tbl_sequence SET next_value = LAST_INSERT_ID(next_value + %s) WHERE name = %s",
+                               (size, name))
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+        return end - size, end
+
+
+_allocator = TicketAllocator()
+
+
+def next_ticket_number():
+    return _allocator.next_ticket()
+
+
+def allocate_ticket_numbers(count):
+    return _allocator.allocate(count)
@@ -0,0 +1,143 @@
+"""Ticket rendering for the payment view.
+
+Tickets are (label, value) pairs. render_html() lays any number of them
+out as one printable document, one ticket per page, from templates
+compiled once at import; render_escpos() produces the byte stream a
+receipt printer expects, which send_to_printer() appends to PRINTER_PATH
+(a plain file standing in for the printer device, kept in SPOOL_DIR next
+to this module unless PARKING_SPOOL_DIR points elsewhere). HTML documents are
+spooled in one temporary directory that only keeps the latest few and is
+removed when the app exits.
+"""
+import atexit
+import html
+import os
+import shutil
+import tempfile
+from string import Template
+
+TICKET_LABELS = ["Ticket Number", "Customer Name", "Vehicle Number", "Contact No", "Aadhar Number",
+                 "Parking Date", "Entry Time", "Exit Time", "Slot Name", "Hours Parked",
+                 "Amount Paid", "Payment Status"]
+SPOOL_DIR = os.environ.get("PARKING_SPOOL_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "spool")
+PRINTER_PATH = os.path.join(SPOOL_DIR, "ticket_printer.bin")
+PRINTER_WIDTH = 42
+SPOOL_KEEP = 5
+
+HTML_DOCUMENT = Template("""<html>
+<head>
+    <title>$title</title>
+    <style>
+        body { font-family: Arial, sans-serif; text-align: center; }
+        .container { width: 400px; margin: 20px auto; border: 2px solid #000; padding: 20px; border-radius: 10px;
+                     page-break-after: always; }
+        .container:last-of-type { page-break-after: auto; }
+        h1 { color: darkblue; }
+        table { width: 100%; border-collapse: collapse; margin-top: 10px; }
+        td { padding: 8px; border-bottom: 1px solid #ddd; text-align: left; }
+        td.label { font-weight: bold; }
+        .footer { font-weight: bold; color: green; margin-top: 10px; }
+    </style>
+</head>
+<body>
+$tickets
+<script>
+    window.onload = function() {
+        window.print();
+        setTimeout(function() {
+            window.close();
+        }, 500);
+    };
+</script>
+</body>
+</html>
+""")
+HTML_TICKET = Template("""<div class="container">
+    <h1>🚗 Parking Ticket</h1>
+    <hr>
+    <table>
+$rows
+    </table>
+    <hr>
+    <p class="footer">Thank You for Choosing Us!</p>
+</div>""")
+HTML_ROW = Template("""        <tr><td class="label">$label:</td><td>$value</td></tr>""")
+
+ESC_INIT = b"\x1b@"
+ESC_BOLD_ON, ESC_BOLD_OFF = b"\x1bE\x01", b"\x1bE\x00"
+ESC_CENTER, ESC_LEFT = b"\x1ba\x01", b"\x1ba\x00"
+ESC_CUT = b"\x1dV\x42\x03"  # feed three lines, then partial cut
+
+_spool_dir = None
+_spooled = []
+
+
+def ticket_from_row(values):
+    """Pairs a payment table row with the ticket labels."""
+    return list(zip(TICKET_LABELS, (str(value) for value in values)))
+
+
+def render_html(tickets):
+    """Renders tickets as one HTML document with a page per ticket."""
+    blocks = []
+    for ticket in tickets:
+        rows = "\n".join(HTML_ROW.substitute(label=html.escape(label), value=html.escape(value))
+                         for label, value in ticket)
+        blocks.append(HTML_TICKET.substitute(rows=rows))
+    title = "Parking Ticket" if len(blocks) == 1 else f"Parking Tickets ({len(blocks)})"
+    return HTML_DOCUMENT.substitute(title=title, tickets="\n".join(blocks))
+
+
+def render_text(ticket, width=PRINTER_WIDTH):
+    """Lays one ticket out as fixed-width lines for a receipt printer."""
+    lines = ["PARKING TICKET".center(width), "-" * width]
+    label_width = max(len(label) for label, _ in ticket) + 2
+    for label, value in ticket:
+        lines.append(f"{label + ':':<{label_width}}{value}"[:width])
+    lines += ["-" * width, "Thank You for Choosing Us!".center(width)]
+    return lines
+
+
+def printable(line):
+    # Receipt printers only have an ASCII code page here
+    return line.replace("₹", "Rs.").encode("ascii", "replace")
+
+
+def render_escpos(tickets, width=PRINTER_WIDTH):
+    """Renders tickets as one ESC/POS byte stream, cutting the paper after each."""
+    out = [ESC_INIT]
+    for ticket in tickets:
+        title, *body = render_text(ticket, width)
+        out += [ESC_CENTER, ESC_BOLD_ON, printable(title.strip()), b"\n", ESC_BOLD_OFF, ESC_LEFT]
+        out += [printable(line) + b"\n" for line in body]
+        out.append(ESC_CUT)
+    return b"".join(out)
+
+
+def send_to_printer(data, path=PRINTER_PATH):
+    """Appends a rendered byte stream to the printer stand-in file and returns its path."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "ab") as printer:
+        printer.write(data)
+    return os.path.abspath(path)
+
+
+def spool_html(document):
+    """Writes a document into the spool directory, dropping the oldest ones, and returns its path."""
+    global _spool_dir
+    if _spool_dir is None:
+        _spool_dir = tempfile.mkdtemp(prefix="parking-tickets-")
+        atexit.register(shutil.rmtree, _spool_dir, ignore_errors=True)
+
+    fd, path = tempfile.mkstemp(suffix=".html", dir=_spool_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.write(document)
+
+    _spooled.append(path)
+    # A browser may still be reading the latest documents; older ones are done
+    while len(_spooled) > SPOOL_KEEP:
+        try:
+            os.remove(_spooled.pop(0))
+        except OSError:
+            pass
+    return path